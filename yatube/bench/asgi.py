@@ -0,0 +1,129 @@
+"""Пропускная способность WSGI и ASGI при одинаковом числе потоков.
+
+Оба режима обслуживают requests запросов к одному адресу при
+concurrency одновременных клиентах и workers потоках с Django.
+Медленный клиент моделируется задержкой client_delay на отдачу тела:
+в WSGI поток пишет ответ в сокет сам и ждёт клиента, в ASGI ответ
+отдаёт цикл событий, а поток уже свободен. Запросы идут в процессе,
+без сети, так что разница показывает именно модель исполнения.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.core.wsgi import get_wsgi_application
+
+from core.asgi import WsgiToAsgi, build_environ
+from core.profiling import percentile
+
+
+def _scope(url):
+    parts = urlsplit(url)
+    return {
+        'type': 'http',
+        'method': 'GET',
+        'path': parts.path,
+        'query_string': parts.query.encode(),
+        'headers': [(b'host', b'testserver')],
+        'server': ('testserver', 80),
+        'client': ('127.0.0.1', 0),
+    }
+
+
+def _summary(timings, statuses, elapsed):
+    return {
+        'requests': len(timings),
+        'requests_per_second': round(len(timings) / elapsed, 1),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'statuses': {str(code): statuses.count(code) for code in
+                     sorted(set(statuses))},
+    }
+
+
+def bench_wsgi(url, requests, workers, concurrency, client_delay):
+    application = get_wsgi_application()
+    statuses = []
+    slots = threading.BoundedSemaphore(concurrency)
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(int(status.split(' ', 1)[0]))
+
+    def serve(queued):
+        try:
+            result = application(build_environ(_scope(url), b''),
+                                 start_response)
+            try:
+                for _ in result:
+                    pass
+                # Поток ждёт, пока медленный клиент заберёт ответ.
+                time.sleep(client_delay)
+            finally:
+                result.close()
+            return (time.perf_counter() - queued) * 1000
+        finally:
+            slots.release()
+
+    started = time.perf_counter()
+    futures = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for _ in range(requests):
+            slots.acquire()
+            futures.append(executor.submit(serve, time.perf_counter()))
+    timings = [future.result() for future in futures]
+    return _summary(timings, statuses, time.perf_counter() - started)
+
+
+async def _asgi_requests(application, url, requests, concurrency,
+                         client_delay):
+    statuses = []
+    slots = asyncio.Semaphore(concurrency)
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            statuses.append(message['status'])
+        elif not message.get('more_body'):
+            await asyncio.sleep(client_delay)
+
+    async def serve():
+        async with slots:
+            started = time.perf_counter()
+            await application(_scope(url), receive, send)
+            return (time.perf_counter() - started) * 1000
+
+    timings = await asyncio.gather(*(serve() for _ in range(requests)))
+    return timings, statuses
+
+
+def bench_asgi(url, requests, workers, concurrency, client_delay):
+    application = WsgiToAsgi(get_wsgi_application(), threads=workers)
+    loop = asyncio.new_event_loop()
+    started = time.perf_counter()
+    try:
+        timings, statuses = loop.run_until_complete(_asgi_requests(
+            application, url, requests, concurrency, client_delay
+        ))
+    finally:
+        application.executor.shutdown(wait=True)
+        loop.close()
+    return _summary(timings, statuses, time.perf_counter() - started)
+
+
+def run(url='/', requests=200, workers=4, concurrency=50,
+        client_delay=0.05):
+    """Отчёт для JSON: одинаковая нагрузка в двух режимах."""
+    return {
+        'started': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'url': url,
+        'workers': workers,
+        'concurrency': concurrency,
+        'client_delay_ms': round(client_delay * 1000, 3),
+        'wsgi': bench_wsgi(
+            url, requests, workers, concurrency, client_delay),
+        'asgi': bench_asgi(url, requests, workers, concurrency, client_delay),
+    }
@@ -0,0 +1,35 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+
+def is_scratch_database():
+    """База для замеров: тестовая (test_...) или в памяти."""
+    name = str(connection.settings_dict['NAME'])
+    if connection.vendor == 'sqlite' and (
+            connection.creation.is_in_memory_db(name)):
+        return True
+    return os.path.basename(name).startswith('test_')
+
+
+class BenchCommand(BaseCommand):
+    """Команда замеров: пишет в базу, поэтому не трогает рабочую.
+
+    Без --allow-live-db команда работает только с базой, имя которой
+    начинается с test_, или с базой в памяти.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--allow-live-db', action='store_true',
+            help='Разрешить замеры на базе, которая не выглядит тестовой.',
+        )
+
+    def execute(self, *args, **options):
+        if not options.get('allow_live_db') and not is_scratch_database():
+            raise CommandError(
+                f"База {connection.settings_dict['NAME']} не похожа на "
+                'тестовую: укажите YATUBE_DB=test_... или --allow-live-db.'
+            )
+        return super().execute(*args, **options)
@@ -0,0 +1,47 @@
+import json
+
+from django.core.management.base import CommandError
+
+from bench.management.base import BenchCommand
+from bench.runner import VIEWS, run
+
+
+class Command(BenchCommand):
+    help = (
+        'Замеряет время ответа, число SQL-запросов и память views постов '
+        'и выводит отчёт в JSON.'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            'views', nargs='*',
+            help=f'Какие views замерить: {", ".join(VIEWS)}.',
+        )
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--memory-samples', type=int, default=3)
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кэш перед каждым запросом.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Файл для отчёта.')
+
+    def handle(self, *args, **options):
+        views = options['views'] or VIEWS
+        unknown = set(views) - set(VIEWS)
+        if unknown:
+            raise CommandError(f'Неизвестные views: {", ".join(unknown)}')
+        report = run(
+            views=views,
+            requests=options['requests'],
+            memory_samples=options['memory_samples'],
+            cold=options['cold'],
+            seed_value=options['seed'],
+        )
+        data = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(data)
+        else:
+            self.stdout.write(data)
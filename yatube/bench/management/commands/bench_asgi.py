@@ -0,0 +1,39 @@
+import json
+
+
+from bench.management.base import BenchCommand
+from bench.asgi import run
+
+
+class Command(BenchCommand):
+    help = (
+        'Сравнивает пропускную способность WSGI и ASGI при одинаковом '
+        'числе потоков и выводит отчёт в JSON.'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--url', default='/')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument(
+            '--client-delay', type=float, default=50,
+            help='Сколько миллисекунд клиент забирает ответ.',
+        )
+        parser.add_argument('--output', help='Файл для отчёта.')
+
+    def handle(self, *args, **options):
+        report = run(
+            url=options['url'],
+            requests=options['requests'],
+            workers=options['workers'],
+            concurrency=options['concurrency'],
+            client_delay=options['client_delay'] / 1000,
+        )
+        data = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(data)
+        else:
+            self.stdout.write(data)
@@ -0,0 +1,31 @@
+from bench.management.base import BenchCommand
+from bench.seed import seed
+
+
+class Command(BenchCommand):
+    help = 'Добавляет в базу данные для нагрузочных замеров.'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--comments', type=int, default=3000)
+        parser.add_argument('--follows', type=int, default=1000)
+        parser.add_argument(
+            '--exponent', type=float, default=1.1,
+            help='Показатель Ципфа: чем больше, тем сильнее перекос.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        seed(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            comments=options['comments'],
+            follows=options['follows'],
+            exponent=options['exponent'],
+            seed_value=options['seed'],
+            stdout=self.stdout,
+        )
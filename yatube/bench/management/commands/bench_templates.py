@@ -0,0 +1,29 @@
+import json
+
+
+from bench.management.base import BenchCommand
+from bench.templates import run
+
+
+class Command(BenchCommand):
+    help = (
+        'Замеряет время рендера каждого шаблона без кэша загрузчика и с '
+        'ним и выводит отчёт в JSON.'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Файл для отчёта.')
+
+    def handle(self, *args, **options):
+        report = run(
+            iterations=options['iterations'], seed_value=options['seed']
+        )
+        data = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(data)
+        else:
+            self.stdout.write(data)
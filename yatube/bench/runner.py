@@ -0,0 +1,165 @@
+"""Замеры views постов через тестовый клиент.
+
+Каждый view вызывается requests раз со случайными параметрами из
+данных в базе: страница ленты, группа, автор, пост. Для каждого
+запроса записываются время ответа и число SQL-запросов, а пик памяти
+снимается отдельным проходом под tracemalloc, чтобы трассировка не
+искажала время.
+"""
+import random
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.profiling import percentile
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+PAGES = 5
+LOGGED_IN_CLIENTS = 10
+
+
+class Scenarios:
+    """Запросы к каждому view на данных из базы."""
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.post_ids = list(Post.objects.values_list('pk', flat=True))
+        self.slugs = list(Group.objects.values_list('slug', flat=True))
+        self.usernames = list(
+            User.objects.filter(posts__isnull=False).distinct().values_list(
+                'username', flat=True)
+        )
+        # Лента подписок интересна у тех, кто подписан на многих.
+        readers = User.objects.order_by(
+            '-counters__following_count'
+        )[:LOGGED_IN_CLIENTS]
+        self.clients = []
+        for user in readers:
+            client = Client()
+            client.force_login(user)
+            self.clients.append(client)
+        self.anonymous = Client()
+
+    def page(self):
+        return {'page': self.rng.randint(1, PAGES)}
+
+    def user_client(self):
+        return self.rng.choice(self.clients)
+
+    def index(self):
+        return self.anonymous, 'get', reverse('posts:index'), self.page()
+
+    def group_posts(self):
+        slug = self.rng.choice(self.slugs)
+        url = reverse('posts:group_list', args=[slug])
+        return self.anonymous, 'get', url, self.page()
+
+    def profile(self):
+        username = self.rng.choice(self.usernames)
+        url = reverse('posts:profile', args=[username])
+        return self.anonymous, 'get', url, self.page()
+
+    def post_detail(self):
+        post_id = self.rng.choice(self.post_ids)
+        url = reverse('posts:post_detail', args=[post_id])
+        return self.anonymous, 'get', url, {}
+
+    def follow_index(self):
+        url = reverse('posts:follow_index')
+        return self.user_client(), 'get', url, self.page()
+
+    def add_comment(self):
+        post_id = self.rng.choice(self.post_ids)
+        url = reverse('posts:add_comment', args=[post_id])
+        data = {'text': f'Комментарий замера {self.rng.random()}'}
+        return self.user_client(), 'post', url, data
+
+    def is_available(self, view):
+        needs = {
+            'group_posts': self.slugs,
+            'profile': self.usernames,
+            'post_detail': self.post_ids,
+            'follow_index': self.clients,
+            'add_comment': self.clients and self.post_ids,
+        }
+        return bool(needs.get(view, True))
+
+
+VIEWS = (
+    'index', 'group_posts', 'profile', 'post_detail', 'follow_index',
+    'add_comment',
+)
+
+
+def _request(scenario, cold):
+    client, method, url, data = scenario()
+    if cold:
+        cache.clear()
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        response = getattr(client, method)(url, data)
+        elapsed = time.perf_counter() - started
+    return elapsed * 1000, len(queries), response.status_code
+
+
+def _peak_memory(scenario, cold):
+    tracemalloc.start()
+    try:
+        _request(scenario, cold)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_view(scenario, requests, memory_samples, cold):
+    timings, query_counts, statuses = [], [], {}
+    for _ in range(requests):
+        elapsed, queries, status = _request(scenario, cold)
+        timings.append(elapsed)
+        query_counts.append(queries)
+        statuses[status] = statuses.get(status, 0) + 1
+    peaks = [_peak_memory(scenario, cold) for _ in range(memory_samples)]
+    return {
+        'requests': requests,
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'max_ms': round(max(timings), 3),
+        'queries_p50': percentile(query_counts, 50),
+        'queries_max': max(query_counts),
+        'peak_memory_kb': round(max(peaks) / 1024, 1) if peaks else None,
+        'statuses': {str(code): count for code, count in statuses.items()},
+    }
+
+
+def run(views=VIEWS, requests=50, memory_samples=3, cold=False,
+        seed_value=0):
+    """Замерить views и вернуть отчёт в виде словаря для JSON."""
+    scenarios = Scenarios(random.Random(seed_value))
+    report = {
+        'started': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'cold_cache': cold,
+        'dataset': {
+            'users': User.objects.count(),
+            'groups': len(scenarios.slugs),
+            'posts': len(scenarios.post_ids),
+            'comments': Comment.objects.count(),
+            'follows': Follow.objects.count(),
+        },
+        'views': {},
+    }
+    for view in views:
+        if not scenarios.is_available(view):
+            report['views'][view] = None
+            continue
+        report['views'][view] = bench_view(
+            getattr(scenarios, view), requests, memory_samples, cold
+        )
+    return report
@@ -0,0 +1,157 @@
+"""Заполнение базы данными для нагрузочных замеров.
+
+Записи создаются через bulk_create, поэтому сигналы не срабатывают:
+ленты подписок, счётчики и поисковый индекс строятся после вставки
+штатными командами. Авторы, подписчики и комментарии распределены
+по закону Ципфа — у немногих их очень много, у большинства почти нет.
+"""
+import random
+from itertools import accumulate, islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+BENCH_PASSWORD = 'bench-password'
+USERNAME_PREFIX = 'bench_user_'
+GROUP_SLUG_PREFIX = 'bench-'
+CHUNK_SIZE = 5000
+
+WORDS = (
+    'кот собака город море книга утро вечер дорога друг поезд письмо '
+    'солнце дождь лес река музыка фильм работа дом окно'
+).split()
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+class Zipf:
+    """Выбор id с весом 1 / rank ** exponent; первые id популярнее."""
+
+    def __init__(self, rng, ids, exponent):
+        self.rng = rng
+        self.ids = ids
+        self.cum_weights = list(accumulate(
+            1 / (rank + 1) ** exponent for rank in range(len(ids))
+        ))
+
+    def pick(self):
+        return self.rng.choices(self.ids, cum_weights=self.cum_weights)[0]
+
+
+def _bulk_create(model, objs, **kwargs):
+    """bulk_create частями, чтобы не держать в памяти все объекты.
+
+    Размер пакета внутри части Django выбирает сам по лимитам базы.
+    """
+    objs = iter(objs)
+    while True:
+        chunk = list(islice(objs, CHUNK_SIZE))
+        if not chunk:
+            return
+        model.objects.bulk_create(chunk, **kwargs)
+
+
+def _follow_pairs(rng, user_ids, authors, count):
+    """Пары (подписчик, автор) без подписок на самого себя."""
+    if len(user_ids) < 2:
+        return
+    made = 0
+    while made < count:
+        user_id, author_id = rng.choice(user_ids), authors.pick()
+        if user_id != author_id:
+            made += 1
+            yield user_id, author_id
+
+
+def _create_users(count):
+    start = User.objects.filter(username__startswith=USERNAME_PREFIX).count()
+    password = make_password(BENCH_PASSWORD)
+    _bulk_create(
+        User,
+        (
+            User(username=f'{USERNAME_PREFIX}{start + i}', password=password)
+            for i in range(count)
+        ),
+    )
+    return list(
+        User.objects.filter(
+            username__startswith=USERNAME_PREFIX
+        ).order_by('pk').values_list('pk', flat=True)
+    )
+
+
+def _create_groups(rng, count):
+    start = Group.objects.filter(slug__startswith=GROUP_SLUG_PREFIX).count()
+    _bulk_create(
+        Group,
+        (
+            Group(
+                title=f'Группа {start + i}',
+                slug=f'{GROUP_SLUG_PREFIX}{start + i}',
+                description=_text(rng, 12),
+            )
+            for i in range(count)
+        ),
+    )
+    return list(
+        Group.objects.filter(
+            slug__startswith=GROUP_SLUG_PREFIX
+        ).values_list('pk', flat=True)
+    )
+
+
+def seed(users=100, groups=10, posts=1000, comments=3000, follows=1000,
+         exponent=1.1, seed_value=0, stdout=None):
+    """Добавить пользователей, группы, посты, комментарии и подписки."""
+    rng = random.Random(seed_value)
+    user_ids = _create_users(users)
+    group_ids = _create_groups(rng, groups) + [None]
+    authors = Zipf(rng, user_ids, exponent)
+    _bulk_create(
+        Post,
+        (
+            Post(
+                text=_text(rng, rng.randint(5, 60)),
+                author_id=authors.pick(),
+                group_id=rng.choice(group_ids),
+            )
+            for _ in range(posts)
+        ),
+    )
+    post_ids = list(
+        Post.objects.filter(
+            author__username__startswith=USERNAME_PREFIX
+        ).order_by('pk').values_list('pk', flat=True)
+    )
+    # Самые обсуждаемые посты разбросаны по ленте, а не только в начале.
+    rng.shuffle(post_ids)
+    commented = Zipf(rng, post_ids, exponent)
+    _bulk_create(
+        Comment,
+        (
+            Comment(
+                post_id=commented.pick(),
+                author_id=rng.choice(user_ids),
+                text=_text(rng, rng.randint(3, 20)),
+            )
+            for _ in range(comments if post_ids else 0)
+        ),
+    )
+    _bulk_create(
+        Follow,
+        (
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id, author_id in _follow_pairs(
+                rng, user_ids, authors, follows)
+        ),
+        ignore_conflicts=True,
+    )
+    for command in ('recount', 'backfill_feed', 'rebuild_search_index'):
+        call_command(command, stdout=stdout)
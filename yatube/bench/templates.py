@@ -0,0 +1,135 @@
+"""Замер рендера шаблонов с кэширующим загрузчиком и без него.
+
+Контексты снимаются с настоящих ответов views: на время запросов
+включается та же отправка сигнала template_rendered, что и в тестах,
+а кэш подменяется локальным, чтобы очистка не задела общий.
+Затем каждый шаблон рендерится iterations раз двумя движками с
+одинаковыми библиотеками тегов: без кэша шаблон читается и
+разбирается заново при каждом рендере, с кэшем — один раз. Отдельно
+сравнивается reverse() для адреса поста со склейкой готового префикса.
+"""
+import random
+import time
+
+from django.core.cache import cache
+from django.template import Context, Engine, engines
+from django.template.base import Template
+from django.test import override_settings
+from django.test.signals import template_rendered
+from django.test.utils import instrumented_test_render
+from django.urls import reverse
+
+from core.context_processors.urls import url_prefixes
+from core.profiling import percentile
+
+from .runner import Scenarios
+
+VIEWS = ('index', 'group_posts', 'profile', 'post_detail', 'follow_index')
+
+LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+# Кэш на время снятия контекстов: страницы каждый раз строятся заново,
+# а кэш сайта, например общий Redis, не очищается.
+PRIVATE_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'bench-templates',
+    },
+}
+
+
+def capture_contexts(scenarios, views=VIEWS):
+    """Первый контекст каждого шаблона, отрендеренного views."""
+    contexts = {}
+
+    def store(sender, template, context, **kwargs):
+        if template.name and template.name not in contexts:
+            contexts[template.name] = context.flatten()
+
+    original = Template._render
+    Template._render = instrumented_test_render
+    template_rendered.connect(store)
+    try:
+        with override_settings(CACHES=PRIVATE_CACHES):
+            for view in views:
+                if not scenarios.is_available(view):
+                    continue
+                client, method, url, data = getattr(scenarios, view)()
+                # Иначе страница придёт из кэша и шаблоны не
+                # отрендерятся.
+                cache.clear()
+                getattr(client, method)(url, data)
+    finally:
+        template_rendered.disconnect(store)
+        Template._render = original
+    return contexts
+
+
+def _engine(cached):
+    default = engines['django'].engine
+    loaders = [('django.template.loaders.cached.Loader', LOADERS)] if (
+        cached) else LOADERS
+    return Engine(
+        dirs=default.dirs,
+        loaders=loaders,
+        libraries=default.libraries,
+        builtins=default.builtins[len(Engine.default_builtins):],
+    )
+
+
+def _timings(engine, name, context, iterations):
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        engine.get_template(name).render(Context(context))
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def bench_template(name, context, iterations):
+    uncached = _timings(_engine(cached=False), name, context, iterations)
+    cached = _timings(_engine(cached=True), name, context, iterations)
+    before, after = percentile(uncached, 50), percentile(cached, 50)
+    return {
+        'uncached_p50_ms': round(before, 3),
+        'uncached_p95_ms': round(percentile(uncached, 95), 3),
+        'cached_p50_ms': round(after, 3),
+        'cached_p95_ms': round(percentile(cached, 95), 3),
+        'speedup': round(before / after, 2) if after else None,
+    }
+
+
+def bench_post_urls(post_ids, iterations):
+    """Время на один адрес поста: reverse() и склейка префикса, мкс."""
+    post_ids = post_ids or [1]
+    started = time.perf_counter()
+    for index in range(iterations):
+        reverse('posts:post_detail', args=[post_ids[index % len(post_ids)]])
+    reversed_us = (time.perf_counter() - started) / iterations * 1e6
+    post_url = url_prefixes()['post_url']
+    started = time.perf_counter()
+    for index in range(iterations):
+        f'{post_url}{post_ids[index % len(post_ids)]}/'
+    prefixed_us = (time.perf_counter() - started) / iterations * 1e6
+    return {
+        'reverse_us': round(reversed_us, 3),
+        'prefix_us': round(prefixed_us, 3),
+    }
+
+
+def run(iterations=50, seed_value=0):
+    """Отчёт о рендере каждого шаблона в виде словаря для JSON."""
+    scenarios = Scenarios(random.Random(seed_value))
+    contexts = capture_contexts(scenarios)
+    return {
+        'started': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'iterations': iterations,
+        'templates': {
+            name: bench_template(name, context, iterations)
+            for name, context in sorted(contexts.items())
+        },
+        'post_urls': bench_post_urls(scenarios.post_ids, iterations * 100),
+    }
@@ -0,0 +1,85 @@
+import json
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+
+from posts.models import Follow, Post
+
+from .runner import VIEWS, percentile
+from .seed import USERNAME_PREFIX, seed
+
+
+class BenchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        seed(
+            users=6, groups=2, posts=30, comments=20, follows=10,
+            stdout=StringIO(),
+        )
+
+    def test_seed_skips_self_follows(self):
+        self.assertEqual(Post.objects.count(), 30)
+        self.assertFalse(
+            Follow.objects.filter(user__username=f'{USERNAME_PREFIX}0')
+            .filter(author__username=f'{USERNAME_PREFIX}0').exists()
+        )
+
+    def test_report_covers_every_view(self):
+        output = StringIO()
+        call_command(
+            'bench', requests=3, memory_samples=1, stdout=output
+        )
+        report = json.loads(output.getvalue())
+        self.assertEqual(report['dataset']['posts'], 30)
+        self.assertEqual(set(report['views']), set(VIEWS))
+        for view, result in report['views'].items():
+            with self.subTest(view=view):
+                self.assertEqual(result['requests'], 3)
+                self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+                self.assertGreater(result['peak_memory_kb'], 0)
+                expected = '302' if view == 'add_comment' else '200'
+                self.assertEqual(result['statuses'], {expected: 3})
+
+    def test_template_report_compares_loaders(self):
+        output = StringIO()
+        cache.set('bench:kept', 1)
+        call_command('bench_templates', iterations=2, stdout=output)
+        self.assertEqual(cache.get('bench:kept'), 1)
+        report = json.loads(output.getvalue())
+        templates = report['templates']
+        for name in ('posts/index.html', 'posts/includes/index_card.html',
+                     'posts/post_detail.html'):
+            with self.subTest(template=name):
+                self.assertIn(name, templates)
+                self.assertGreater(templates[name]['uncached_p50_ms'], 0)
+                self.assertGreater(templates[name]['cached_p50_ms'], 0)
+        self.assertGreater(report['post_urls']['reverse_us'], 0)
+
+    def test_asgi_report_compares_modes(self):
+        output = StringIO()
+        call_command(
+            'bench_asgi', url='/about/author/', requests=4, workers=2,
+            concurrency=4, client_delay=1, stdout=output,
+        )
+        report = json.loads(output.getvalue())
+        for mode in ('wsgi', 'asgi'):
+            with self.subTest(mode=mode):
+                self.assertEqual(report[mode]['statuses'], {'200': 4})
+                self.assertGreater(report[mode]['requests_per_second'], 0)
+
+    def test_live_database_is_refused(self):
+        with mock.patch.dict(connection.settings_dict, NAME='/srv/db.sqlite3'):
+            with self.assertRaises(CommandError):
+                call_command('bench_seed', users=1, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 30)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile([7], 95), 7)
@@ -0,0 +1,164 @@
+"""Запуск WSGI-приложения Django под сервером ASGI.
+
+Django 2.2 не умеет ASGI, поэтому адаптер собирает запрос из событий
+ASGI в окружение WSGI, выполняет обработчик Django в пуле из
+ASGI_THREADS потоков и отдаёт ответ клиенту из цикла событий. Поток
+с Django освобождается, как только ответ готов: медленный клиент
+занимает только соединение. Обычный ответ собирается в потоке
+целиком, потоковый (StreamingHttpResponse) читается из пула по одной
+части и отправляется клиенту сразу.
+
+Представления остаются синхронными: запросы к базе внутри одного
+представления выполняются по очереди, ASGI освобождает потоки только
+от ожидания клиентов.
+"""
+import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+
+
+def build_environ(scope, body):
+    """Окружение WSGI для HTTP-запроса ASGI."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        # WSGI хранит путь как байты в latin-1.
+        'PATH_INFO': scope['path'].encode().decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        value = value.decode('latin-1')
+        if name in environ:
+            value = f'{environ[name]},{value}'
+        environ[name] = value
+    return environ
+
+
+class WsgiToAsgi:
+    """Приложение ASGI поверх приложения WSGI."""
+
+    def __init__(self, wsgi_application, threads=None):
+        self.wsgi_application = wsgi_application
+        self.threads = threads
+        self._executor = None
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.threads or settings.ASGI_THREADS
+            )
+        return self._executor
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(f"Неподдерживаемый тип: {scope['type']}")
+        body = await self._read_body(receive)
+        if body is None:
+            return
+        loop = asyncio.get_event_loop()
+        status, headers, result = await loop.run_in_executor(
+            self.executor, self._respond, build_environ(scope, body)
+        )
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': headers,
+        })
+        if isinstance(result, list):
+            for chunk in result:
+                await self._send_chunk(send, chunk)
+        else:
+            await self._stream(loop, result, send)
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def _send_chunk(self, send, chunk):
+        await send({
+            'type': 'http.response.body', 'body': chunk, 'more_body': True,
+        })
+
+    async def _stream(self, loop, result, send):
+        """Отправить потоковый ответ, беря части из пула по одной.
+
+        Между частями поток свободен для других запросов. Части могут
+        строиться в разных потоках пула; подключения к базе, открытые
+        ими, Django закроет в начале следующего запроса этих потоков.
+        """
+        chunks = iter(result)
+        try:
+            while True:
+                chunk = await loop.run_in_executor(
+                    self.executor, next, chunks, None)
+                if chunk is None:
+                    return
+                if chunk:
+                    await self._send_chunk(send, chunk)
+        finally:
+            if hasattr(result, 'close'):
+                await loop.run_in_executor(self.executor, result.close)
+
+    async def _read_body(self, receive):
+        """Тело запроса или None, если клиент отключился."""
+        body = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            body.append(message.get('body', b''))
+            if not message.get('more_body'):
+                return b''.join(body)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self._executor is not None:
+                    self._executor.shutdown(wait=True)
+                    self._executor = None
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _respond(self, environ):
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers
+            ]
+
+        result = self.wsgi_application(environ, start_response)
+        if getattr(result, 'streaming', False):
+            return started['status'], started['headers'], result
+        try:
+            # close() шлёт request_finished и закрывает подключения
+            # к базе, поэтому вызывается в том же потоке.
+            chunks = [chunk for chunk in result if chunk]
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return started['status'], started['headers'], chunks
@@ -0,0 +1,193 @@
+"""Кэш страниц с поколениями вместо короткого срока жизни.
+
+Каждой группе страниц соответствует счётчик поколения в кэше. Ключ
+закэшированной страницы включает текущее поколение, поэтому после
+bump_generation() старые страницы больше не читаются и срок их жизни
+может быть долгим. Пока страница нового поколения строится, остальные
+запросы ждут её под блокировкой, а не строят ту же страницу разом.
+
+Счётчик поколения и страницы лежат в пространстве ключей с тем же
+именем (CacheNamespace), так что их можно забыть и сменой версии
+пространства в CACHE_NAMESPACE_VERSIONS.
+"""
+import time
+from functools import wraps
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.utils.cache import (
+    get_cache_key, learn_cache_key, patch_vary_headers,
+)
+
+from .profiling import count_cache
+
+
+class CacheNamespace:
+    """Часть кэша с ключами вида name:ключ и своей версией.
+
+    Версия берётся из CACHE_NAMESPACE_VERSIONS и передаётся кэшу
+    Django, поэтому после её увеличения старые записи не читаются ни
+    одним процессом. Поддерживает то подмножество API кэша, которое
+    нужно проекту, в том числе get_cache_key и learn_cache_key.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    @property
+    def version(self):
+        return settings.CACHE_NAMESPACE_VERSIONS.get(self.name, 1)
+
+    def key(self, key):
+        return f'{self.name}:{key}'
+
+    def get(self, key, default=None):
+        return cache.get(self.key(key), default, version=self.version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        cache.set(self.key(key), value, timeout, version=self.version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT):
+        return cache.add(self.key(key), value, timeout, version=self.version)
+
+    def delete(self, key):
+        cache.delete(self.key(key), version=self.version)
+
+    def incr(self, key, delta=1):
+        return cache.incr(self.key(key), delta, version=self.version)
+
+    def get_many(self, keys):
+        keys = {self.key(key): key for key in keys}
+        found = cache.get_many(keys, version=self.version)
+        return {keys[key]: value for key, value in found.items()}
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT):
+        cache.set_many(
+            {self.key(key): value for key, value in data.items()},
+            timeout, version=self.version,
+        )
+
+
+def get_generation(name):
+    namespace = CacheNamespace(name)
+    generation = namespace.get('generation')
+    if generation is None:
+        # Начальное значение от времени: если счётчик вытеснили из
+        # кэша, новое поколение не совпадёт со старыми страницами.
+        namespace.add('generation', int(time.time()), timeout=None)
+        generation = namespace.get('generation')
+    return generation
+
+
+def bump_generation(name):
+    namespace = CacheNamespace(name)
+    try:
+        namespace.incr('generation')
+    except ValueError:
+        namespace.add('generation', int(time.time()), timeout=None)
+    namespace.set('changed', time.time(), timeout=None)
+
+
+def generation_changed(name):
+    """Время последней смены поколения (timestamp) или None."""
+    return CacheNamespace(name).get('changed')
+
+
+def _replay_stream(pages, prefix, count, make_chunks):
+    for index in range(count):
+        chunk = pages.get(f'{prefix}:{index}')
+        if chunk is None:
+            yield from islice(make_chunks(), index, None)
+            return
+        yield chunk
+
+
+def _record_stream(pages, prefix, make_chunks, timeout):
+    count = 0
+    for chunk in make_chunks():
+        pages.set(f'{prefix}:{count}', chunk, timeout)
+        count += 1
+        yield chunk
+    pages.set(f'{prefix}:count', count, timeout)
+
+
+def generational_stream(generation, key, make_chunks, timeout=None):
+    """Части потокового ответа из кэша или из make_chunks().
+
+    Части сохраняются по одной, пока ответ отдаётся впервые, а их
+    число записывается в конце, поэтому ни запись, ни чтение не
+    держат в памяти весь ответ. Если часть вытеснили из кэша, поток
+    продолжается из make_chunks() с того же места.
+    """
+    pages = CacheNamespace(generation)
+    prefix = f'stream:{get_generation(generation)}:{key}'
+    count = pages.get(f'{prefix}:count')
+    count_cache(hits=count is not None, misses=count is None)
+    if count is not None:
+        return _replay_stream(pages, prefix, count, make_chunks)
+    timeout = timeout or settings.PAGE_CACHE_TIMEOUT
+    return _record_stream(pages, prefix, make_chunks, timeout)
+
+
+def _cached_page(request, pages, prefix):
+    key = get_cache_key(request, prefix, 'GET', cache=pages)
+    return (pages.get(key) if key else None), key
+
+
+def _wait_for_page(request, pages, prefix, wait):
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        response, _ = _cached_page(request, pages, prefix)
+        if response is not None:
+            return response
+    return None
+
+
+def _store_page(request, response, pages, prefix, timeout):
+    patch_vary_headers(response, ('Cookie',))
+    if response.status_code == 200 and not response.cookies:
+        key = learn_cache_key(request, response, timeout, prefix, cache=pages)
+        pages.set(key, response, timeout)
+
+
+def generational_cache_page(generation, timeout=None, lock_timeout=None):
+    """Аналог cache_page, ключ которого зависит от поколения generation.
+
+    Страница всегда различается по Cookie: шапка показывает имя
+    пользователя, а заголовок Vary от SessionMiddleware появляется уже
+    после декоратора.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            page_timeout = timeout or settings.PAGE_CACHE_TIMEOUT
+            wait = lock_timeout or settings.PAGE_CACHE_LOCK_TIMEOUT
+            pages = CacheNamespace(generation)
+            prefix = f'{generation}.{get_generation(generation)}'
+            response, key = _cached_page(request, pages, prefix)
+            count_cache(hits=response is not None, misses=response is None)
+            if response is not None:
+                return response
+            # Ключ учитывает Vary, поэтому запросы, которым нужны разные
+            # страницы, не ждут друг друга.
+            lock = f'page-lock:{key or request.get_full_path()}'
+            locked = pages.add(lock, 1, wait)
+            if not locked:
+                response = _wait_for_page(request, pages, prefix, wait)
+                if response is not None:
+                    return response
+            try:
+                response = view(request, *args, **kwargs)
+                _store_page(request, response, pages, prefix, page_timeout)
+                return response
+            finally:
+                if locked:
+                    pages.delete(lock)
+        return wrapper
+    return decorator
@@ -0,0 +1,29 @@
+"""Готовые начала адресов постов, профилей и групп для шаблонов.
+
+{% url %} в цикле по карточкам разбирает URLconf на каждой строке.
+С префиксом адрес собирается склейкой строк:
+{{ post_url }}{{ post.pk }}/, {{ profile_url }}{{ username }}/,
+{{ group_url }}{{ slug }}/.
+"""
+from functools import lru_cache
+
+from django.urls import get_script_prefix, reverse
+
+URL_PATTERNS = {
+    'post_url': ('posts:post_detail', 0),
+    'profile_url': ('posts:profile', 'x'),
+    'group_url': ('posts:group_list', 'x'),
+}
+
+
+@lru_cache(maxsize=8)
+def _prefixes(script_prefix):
+    prefixes = {}
+    for name, (view_name, sample) in URL_PATTERNS.items():
+        url = reverse(view_name, args=[sample])
+        prefixes[name] = url[:-len(f'{sample}/')]
+    return prefixes
+
+
+def url_prefixes(request=None):
+    return _prefixes(get_script_prefix())
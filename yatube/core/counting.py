@@ -0,0 +1,65 @@
+"""Число записей запроса из кэша: точное или оценка планировщика.
+
+Ключ включает подпись запроса (SQL с параметрами) и поколения, от
+которых зависит результат, поэтому одинаковые ленты не считаются
+заново, пока поколение не сменится. Выше порога estimate_above точный
+COUNT заменяется оценкой планировщика там, где база её даёт
+(PostgreSQL); на остальных базах число считается точно и живёт в кэше
+до смены поколения.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.db import connections
+
+from .cache import CacheNamespace, get_generation
+
+
+def _count_sql(queryset):
+    return queryset.order_by().query.sql_with_params()
+
+
+def queryset_signature(queryset):
+    sql, params = _count_sql(queryset)
+    raw = f'{queryset.db}:{sql}:{params!r}'
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def estimate_count(queryset):
+    """Оценка числа строк от планировщика или None."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = _count_sql(queryset)
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def count_rows(queryset, estimate_above=None):
+    """Число записей и признак того, что оно точное."""
+    if estimate_above:
+        # COUNT с LIMIT не сканирует больше estimate_above + 1 строк.
+        bounded = queryset.order_by()[:estimate_above + 1].count()
+        if bounded <= estimate_above:
+            return bounded, True
+        estimate = estimate_count(queryset)
+        if estimate is not None:
+            return max(estimate, bounded), False
+    return queryset.count(), True
+
+
+def cached_count(queryset, generations, estimate_above=None):
+    """count_rows() из кэша первого из поколений generations."""
+    namespace = CacheNamespace(generations[0])
+    stamp = ':'.join(str(get_generation(name)) for name in generations)
+    key = f'count:{stamp}:{queryset_signature(queryset)}'
+    cached = namespace.get(key)
+    if cached is None:
+        cached = count_rows(queryset, estimate_above)
+        namespace.set(key, cached, settings.PAGE_CACHE_TIMEOUT)
+    return tuple(cached)
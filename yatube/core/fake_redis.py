@@ -0,0 +1,169 @@
+"""Сервер с протоколом Redis в памяти процесса для тестов.
+
+Понимает только команды, которые отправляет core.redis_cache, и
+работает в фоновом потоке на свободном порту 127.0.0.1.
+"""
+import re
+import socketserver
+import threading
+import time
+from fnmatch import fnmatchcase
+
+
+class _Store:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data = {}
+        self.expires = {}
+
+    def alive(self, key):
+        deadline = self.expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+    def put(self, key, value, px=None):
+        self.data[key] = value
+        self.expires.pop(key, None)
+        if px is not None:
+            self.expires[key] = time.monotonic() + px / 1000
+
+    def drop(self, key):
+        self.expires.pop(key, None)
+        return self.data.pop(key, None) is not None
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            command = self._read_command()
+            if command is None:
+                return
+            name, args = command[0].upper().decode(), command[1:]
+            method = getattr(self.server, f'cmd_{name.lower()}', None)
+            if method is None:
+                self.wfile.write(b'-ERR unknown command\r\n')
+                continue
+            with self.server.store.lock:
+                reply = method(self.server.store, *args)
+            self.wfile.write(self._encode(reply))
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    @staticmethod
+    def _encode(reply):
+        if reply is None:
+            return b'$-1\r\n'
+        if isinstance(reply, str):
+            return b'+%s\r\n' % reply.encode()
+        if isinstance(reply, int):
+            return b':%d\r\n' % reply
+        if isinstance(reply, list):
+            return b'*%d\r\n' % len(reply) + b''.join(
+                _Handler._encode(item) for item in reply
+            )
+        return b'$%d\r\n%s\r\n' % (len(reply), reply)
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _Handler)
+        self.store = _Store()
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address
+        return f'redis://{host}:{port}/0'
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def cmd_ping(self, store):
+        return 'PONG'
+
+    def cmd_select(self, store, db):
+        return 'OK'
+
+    def cmd_get(self, store, key):
+        return store.data[key] if store.alive(key) else None
+
+    def cmd_mget(self, store, *keys):
+        return [self.cmd_get(store, key) for key in keys]
+
+    def cmd_set(self, store, key, value, *options):
+        options = [option.upper() for option in options]
+        px = None
+        if b'PX' in options:
+            px = int(options[options.index(b'PX') + 1])
+        exists = store.alive(key)
+        if (b'NX' in options and exists) or (b'XX' in options and not exists):
+            return None
+        store.put(key, value, px)
+        return 'OK'
+
+    def cmd_del(self, store, *keys):
+        return sum(store.drop(key) for key in keys if store.alive(key))
+
+    def cmd_exists(self, store, *keys):
+        return sum(1 for key in keys if store.alive(key))
+
+    def cmd_incrby(self, store, key, delta):
+        value = int(store.data[key]) if store.alive(key) else 0
+        value += int(delta)
+        store.data[key] = str(value).encode()
+        return value
+
+    def cmd_pexpire(self, store, key, px):
+        if not store.alive(key):
+            return 0
+        store.expires[key] = time.monotonic() + int(px) / 1000
+        return 1
+
+    def cmd_persist(self, store, key):
+        if not store.alive(key):
+            return 0
+        return int(store.expires.pop(key, None) is not None)
+
+    def cmd_scan(self, store, cursor, *options):
+        names = [option.upper() for option in options]
+        pattern, count = b'*', 10
+        if b'MATCH' in names:
+            pattern = options[names.index(b'MATCH') + 1]
+        if b'COUNT' in names:
+            count = int(options[names.index(b'COUNT') + 1])
+        # Экранированный символ шаблона Redis для fnmatch — класс [x].
+        pattern = re.sub(
+            rb'\\(.)', lambda match: b'[' + match.group(1) + b']', pattern
+        )
+        keys = sorted(key for key in list(store.data) if store.alive(key))
+        start = int(cursor)
+        following = start + count if start + count < len(keys) else 0
+        found = [
+            key for key in keys[start:start + count]
+            if fnmatchcase(key, pattern)
+        ]
+        return [str(following).encode(), found]
+
+    def cmd_flushdb(self, store):
+        store.data.clear()
+        store.expires.clear()
+        return 'OK'
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.tasks import prune_finished, run_pending
+
+# Старые завершённые задачи удаляются не чаще раза в столько секунд.
+PRUNE_INTERVAL = 3600
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет фоновые задачи из очереди core.Task. С --interval '
+        'работает постоянным процессом и раз в час удаляет задачи, '
+        'завершённые раньше TASKS_KEEP_DAYS дней назад.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Сколько задач брать за раз; по умолчанию TASKS_BATCH_SIZE.',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Проверять очередь каждые столько секунд, не завершаясь.',
+        )
+
+    def handle(self, *args, **options):
+        pruned_at = None
+        while True:
+            if pruned_at is None or (
+                    time.monotonic() - pruned_at >= PRUNE_INTERVAL):
+                pruned_at = time.monotonic()
+                deleted = prune_finished()
+                if deleted:
+                    self.stdout.write(f'Удалено старых задач: {deleted}')
+            done, failed = run_pending(options['batch_size'])
+            if done or failed:
+                self.stdout.write(f'Выполнено: {done}, с ошибкой: {failed}')
+                continue
+            # Очередь пуста: без --interval команда завершается.
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
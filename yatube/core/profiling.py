@@ -0,0 +1,207 @@
+"""Выборочное профилирование запросов в рабочем режиме.
+
+ProfilingMiddleware записывает для доли запросов PROFILING_SAMPLE_RATE
+число SQL-запросов и их суммарное время, время отрисовки шаблонов,
+попадания и промахи кэша и размер ответа. Записи хранятся в кольцевом
+буфере процесса на PROFILING_BUFFER_SIZE элементов и сводятся по имени
+URL в отчёт для персонала. Запросы вне выборки ничего не измеряют.
+"""
+import math
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.template.backends.django import Template
+
+_local = threading.local()
+_lock = threading.Lock()
+_samples = None
+
+
+def percentile(values, percent):
+    """Процентиль по ближайшему рангу."""
+    ordered = sorted(values)
+    index = max(0, math.ceil(percent / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+class Sample:
+    __slots__ = (
+        'view', 'status', 'duration', 'queries', 'db_time',
+        'template_time', 'template_depth', 'cache_hits', 'cache_misses',
+        'size',
+    )
+
+    def __init__(self):
+        self.view = None
+        self.status = None
+        self.duration = self.db_time = self.template_time = 0.0
+        self.queries = self.template_depth = self.size = 0
+        self.cache_hits = self.cache_misses = 0
+
+
+def current_sample():
+    return getattr(_local, 'sample', None)
+
+
+def count_cache(hits=0, misses=0):
+    """Учесть обращение к кэшу в профиле текущего запроса."""
+    sample = current_sample()
+    if sample is not None:
+        sample.cache_hits += hits
+        sample.cache_misses += misses
+
+
+def _timed_render(render):
+    # Вложенные render_to_string (карточки постов) уже входят во время
+    # внешнего шаблона, поэтому считается только верхний уровень.
+    @wraps(render)
+    def wrapper(self, *args, **kwargs):
+        sample = current_sample()
+        if sample is None:
+            return render(self, *args, **kwargs)
+        sample.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            sample.template_depth -= 1
+            if not sample.template_depth:
+                sample.template_time += time.perf_counter() - started
+    wrapper.profiled = True
+    return wrapper
+
+
+def install_template_timer():
+    """Обернуть отрисовку шаблонов Django; вызывается из CoreConfig."""
+    if not getattr(Template.render, 'profiled', False):
+        Template.render = _timed_render(Template.render)
+
+
+def _query_timer(sample):
+    def execute(execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            sample.queries += 1
+            sample.db_time += time.perf_counter() - started
+    return execute
+
+
+@contextmanager
+def _wrap_connections(wrapper):
+    """execute_wrapper сразу для всех подключений к базам."""
+    wrapped = list(connections.all())
+    for connection in wrapped:
+        connection.execute_wrappers.append(wrapper)
+    try:
+        yield
+    finally:
+        for connection in wrapped:
+            connection.execute_wrappers.remove(wrapper)
+
+
+def _buffer():
+    """Кольцевой буфер процесса; вызывать под _lock."""
+    global _samples
+    if _samples is None:
+        _samples = deque(maxlen=settings.PROFILING_BUFFER_SIZE)
+    return _samples
+
+
+def _record(sample):
+    with _lock:
+        _buffer().append(sample)
+
+
+def clear():
+    with _lock:
+        _buffer().clear()
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unresolved'
+
+
+def _response_size(response):
+    if response.streaming:
+        return 0
+    return len(response.content)
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+        sample = _local.sample = Sample()
+        started = time.perf_counter()
+        try:
+            with _wrap_connections(_query_timer(sample)):
+                response = self.get_response(request)
+        finally:
+            _local.sample = None
+        sample.duration = time.perf_counter() - started
+        sample.view = _view_name(request)
+        sample.status = response.status_code
+        sample.size = _response_size(response)
+        _record(sample)
+        return response
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3)
+
+
+def _summary(samples):
+    durations = [sample.duration for sample in samples]
+    count = len(samples)
+    return {
+        'requests': count,
+        'p50_ms': _ms(percentile(durations, 50)),
+        'p95_ms': _ms(percentile(durations, 95)),
+        'max_ms': _ms(max(durations)),
+        'queries_avg': round(sum(s.queries for s in samples) / count, 2),
+        'queries_max': max(s.queries for s in samples),
+        'db_ms_avg': _ms(sum(s.db_time for s in samples) / count),
+        'template_ms_avg': _ms(
+            sum(s.template_time for s in samples) / count),
+        'cache_hits': sum(s.cache_hits for s in samples),
+        'cache_misses': sum(s.cache_misses for s in samples),
+        'size_avg': round(sum(s.size for s in samples) / count),
+        'errors': sum(1 for s in samples if s.status >= 500),
+    }
+
+
+def report():
+    """Сводка буфера по именам URL, самые медленные по p95 — первыми.
+
+    Для двухуровневого кэша добавляется доля попаданий по уровням.
+    """
+    with _lock:
+        samples = list(_buffer())
+    by_view = defaultdict(list)
+    for sample in samples:
+        by_view[sample.view].append(sample)
+    views = [
+        dict(view=view, **_summary(view_samples))
+        for view, view_samples in by_view.items()
+    ]
+    views.sort(key=lambda row: row['p95_ms'], reverse=True)
+    return {
+        'samples': len(samples),
+        'buffer_size': settings.PROFILING_BUFFER_SIZE,
+        'sample_rate': settings.PROFILING_SAMPLE_RATE,
+        'views': views,
+        'cache_tiers': getattr(cache, 'tier_stats', dict)(),
+    }
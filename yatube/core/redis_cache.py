@@ -0,0 +1,270 @@
+"""Бэкенд кэша Django для серверов с протоколом Redis.
+
+Кэш общий для всех процессов сервера, поэтому страницы и карточки,
+построенные одним процессом, читают остальные, а смена поколения
+сразу видна везде. Клиент говорит на RESP напрямую через сокет и не
+требует сторонних пакетов; у каждого потока своё соединение.
+
+Целые числа хранятся строкой, чтобы incr выполнялся на сервере
+командой INCRBY; остальные значения сериализуются pickle. Если сервер
+недоступен, чтение считается промахом, запись пропускается, а add()
+считается успешным, чтобы никто не ждал чужой блокировки: страница
+строится без кэша. Ошибки пишутся в лог; clear() их не скрывает.
+"""
+import logging
+import pickle
+import re
+import socket
+import threading
+from urllib.parse import urlparse
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+logger = logging.getLogger(__name__)
+
+# Символы шаблона MATCH, которые в префиксе ключей надо экранировать.
+GLOB_SPECIAL = re.compile(r'([*?\[\]\\])')
+
+
+class RedisError(Exception):
+    pass
+
+
+class RedisClient:
+    """Минимальный клиент RESP: команда — список аргументов."""
+
+    def __init__(self, url, socket_timeout=1.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or '127.0.0.1'
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.strip('/') or 0)
+        self.password = parsed.password
+        self.socket_timeout = socket_timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = socket.create_connection(
+            (self.host, self.port), timeout=self.socket_timeout
+        )
+        self._local.sock = sock
+        self._local.reader = sock.makefile('rb')
+        if self.password:
+            self._call_once([('AUTH', self.password)])
+        if self.db:
+            self._call_once([('SELECT', self.db)])
+
+    def close(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None:
+            self._local.reader.close()
+            sock.close()
+            self._local.sock = None
+
+    @staticmethod
+    def _encode(args):
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        return b''.join(parts)
+
+    def _read(self):
+        line = self._local.reader.readline()
+        if not line:
+            raise ConnectionError('Сервер кэша закрыл соединение')
+        kind, rest = line[:1], line[1:-2]
+        if kind == b'+':
+            return rest.decode()
+        if kind == b'-':
+            raise RedisError(rest.decode())
+        if kind == b':':
+            return int(rest)
+        if kind == b'$':
+            length = int(rest)
+            if length < 0:
+                return None
+            return self._local.reader.read(length + 2)[:-2]
+        if kind == b'*':
+            length = int(rest)
+            if length < 0:
+                return None
+            return [self._read() for _ in range(length)]
+        raise RedisError(f'Неизвестный ответ сервера: {line!r}')
+
+    def _call_once(self, commands):
+        self._local.sock.sendall(
+            b''.join(self._encode(args) for args in commands)
+        )
+        return [self._read() for _ in commands]
+
+    def pipeline(self, commands):
+        """Отправить команды одним пакетом и вернуть ответы по порядку.
+
+        Разорванное соединение открывается заново один раз.
+        """
+        for attempt in (1, 2):
+            if getattr(self._local, 'sock', None) is None:
+                self._connect()
+            try:
+                return self._call_once(commands)
+            except (ConnectionError, socket.timeout, OSError):
+                self.close()
+                if attempt == 2:
+                    raise
+
+    def call(self, *args):
+        return self.pipeline([args])[0]
+
+
+class RedisCache(BaseCache):
+    """LOCATION — адрес вида redis://[:пароль@]хост:порт/номер_базы."""
+
+    def __init__(self, server, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.client = RedisClient(
+            server, socket_timeout=options.get('SOCKET_TIMEOUT', 1.0)
+        )
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    @staticmethod
+    def _dump(value):
+        if isinstance(value, int) and not isinstance(value, bool):
+            return str(value).encode()
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _load(data):
+        if data is None:
+            return None
+        # pickle начинается с байта 0x80, целое — с цифры или минуса.
+        if data[:1] == b'\x80':
+            return pickle.loads(data)
+        return int(data)
+
+    def _expiry(self, timeout):
+        """Срок жизни в миллисекундах; None — бессрочно."""
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return None
+        return max(int(timeout * 1000), 0)
+
+    def _set_command(self, key, value, timeout, *flags):
+        command = ['SET', key, self._dump(value), *flags]
+        expiry = self._expiry(timeout)
+        if expiry is not None:
+            command += ['PX', expiry]
+        return command
+
+    def _pipeline(self, commands, failed=None):
+        """Ответы на команды; при недоступном сервере — failed."""
+        try:
+            return self.client.pipeline(commands)
+        except OSError:
+            logger.warning('Сервер кэша недоступен', exc_info=True)
+            return failed
+
+    def _call(self, *args, failed=None):
+        answers = self._pipeline([args])
+        return failed if answers is None else answers[0]
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        if self._expiry(timeout) == 0:
+            return False
+        return self._call(
+            *self._set_command(key, value, timeout, 'NX'), failed='OK'
+        ) is not None
+
+    def get(self, key, default=None, version=None):
+        value = self._load(self._call('GET', self._key(key, version)))
+        return default if value is None else value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        if self._expiry(timeout) == 0:
+            self._call('DEL', key)
+            return
+        self._call(*self._set_command(key, value, timeout))
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        expiry = self._expiry(timeout)
+        if expiry is None:
+            persisted, exists = self._pipeline(
+                [('PERSIST', key), ('EXISTS', key)], failed=(0, 0)
+            )
+            return bool(persisted or exists)
+        return bool(self._call('PEXPIRE', key, expiry))
+
+    def delete(self, key, version=None):
+        self._call('DEL', self._key(key, version))
+
+    def has_key(self, key, version=None):
+        return bool(self._call('EXISTS', self._key(key, version)))
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        # INCRBY создаёт отсутствующий ключ, а Django ждёт ValueError;
+        # без сервера ключа тоже нет.
+        value = None
+        if self._call('EXISTS', key):
+            value = self._call('INCRBY', key, delta)
+        if value is None:
+            raise ValueError(f"Key '{key}' not found")
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = self._call(
+            'MGET', *(self._key(key, version) for key in keys)
+        ) or []
+        return {
+            key: self._load(value)
+            for key, value in zip(keys, values) if value is not None
+        }
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        if self._expiry(timeout) == 0:
+            self.delete_many(data, version=version)
+            return []
+        commands = [
+            self._set_command(self._key(key, version), value, timeout)
+            for key, value in data.items()
+        ]
+        if commands:
+            self._pipeline(commands)
+        return []
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        if keys:
+            self._call('DEL', *keys)
+
+    def clear(self):
+        """Удалить ключи с KEY_PREFIX этого кэша.
+
+        База Redis может быть общей с другими приложениями, поэтому
+        вместо FLUSHDB ключи ищутся через SCAN по префиксу. Без
+        KEY_PREFIX удаляется всё, что есть в базе.
+        """
+        pattern = '*'
+        if self.key_prefix:
+            pattern = GLOB_SPECIAL.sub(r'\\\1', self.key_prefix) + ':*'
+        cursor = b'0'
+        while True:
+            cursor, keys = self.client.call(
+                'SCAN', cursor, 'MATCH', pattern, 'COUNT', 1000
+            )
+            if keys:
+                self.client.call('DEL', *keys)
+            if cursor == b'0':
+                return
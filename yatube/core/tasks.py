@@ -0,0 +1,167 @@
+"""Очередь фоновых задач в таблице core.Task.
+
+Задача — функция, зарегистрированная декоратором @task под именем.
+enqueue() с TASKS_EXECUTOR = 'database' (по умолчанию) пишет строку в
+той же транзакции, что и изменения, которые её вызвали: пишущие views
+выполняются в transaction.atomic(), поэтому задача не теряется и не
+выполняется для отменённой записи. Команда run_tasks
+забирает готовые задачи пачками по TASKS_BATCH_SIZE, повторяет
+упавшие с удвоением задержки до TASKS_MAX_ATTEMPTS попыток и
+подбирает задачи обработчика, который не уложился в TASKS_LEASE
+секунд; пропавший обработчик тоже считается попыткой. Выполненные и
+окончательно упавшие задачи удаляются через TASKS_KEEP_DAYS дней.
+Пока задача с ключом key ждёт в очереди, повторная постановка с тем
+же ключом её не дублирует.
+
+С TASKS_EXECUTOR = 'local' (в тестах) задача
+выполняется сразу в процессе, как обычный вызов функции.
+"""
+import json
+import logging
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def task(name):
+    """Зарегистрировать функцию как задачу с именем name."""
+    def register(function):
+        _registry[name] = function
+        return function
+    return register
+
+
+def is_durable():
+    return settings.TASKS_EXECUTOR == 'database'
+
+
+def enqueue(name, *args, key=''):
+    """Поставить задачу name(*args) в очередь.
+
+    Аргументы должны сериализоваться в JSON; одинаковый key означает
+    одну и ту же работу. Возвращает строку Task или None, если задача
+    выполнена сразу.
+    """
+    if name not in _registry:
+        raise KeyError(f'Неизвестная задача: {name}')
+    if not is_durable():
+        _registry[name](*args)
+        return None
+    payload = json.dumps(args)
+    with transaction.atomic():
+        if key:
+            # Блокировка не даёт обработчику занять ждущую задачу,
+            # пока не зафиксированы изменения, ради которых её ставят.
+            pending = Task.objects.select_for_update().filter(
+                key=key, status=Task.QUEUED).first()
+            if pending is not None:
+                return pending
+        return Task.objects.create(name=name, payload=payload, key=key)
+
+
+def reclaim_expired(now=None):
+    """Вернуть в очередь задачи обработчиков с истёкшей арендой.
+
+    Пропавший обработчик считается попыткой, поэтому задача, которая
+    роняет процесс, не берётся бесконечно.
+    """
+    now = now or timezone.now()
+    expired = Task.objects.filter(status=Task.RUNNING, locked_until__lt=now)
+    error = 'Обработчик не завершил задачу до конца аренды'
+    expired.filter(attempts__gte=settings.TASKS_MAX_ATTEMPTS - 1).update(
+        status=Task.FAILED, attempts=F('attempts') + 1, run_at=now,
+        locked_until=None, worker='', last_error=error,
+    )
+    # Обработчик сбрасывается: опоздавший не отметит задачу за нового.
+    expired.update(
+        status=Task.QUEUED, attempts=F('attempts') + 1, run_at=now,
+        locked_until=None, worker='', last_error=error,
+    )
+
+
+def claim(batch_size=None, now=None):
+    """Занять пачку готовых задач для этого обработчика."""
+    now = now or timezone.now()
+    reclaim_expired(now)
+    ready = Task.objects.filter(
+        status=Task.QUEUED, run_at__lte=now).order_by('run_at', 'pk')
+    ids = list(ready.values_list(
+        'pk', flat=True)[:batch_size or settings.TASKS_BATCH_SIZE])
+    worker = uuid.uuid4().hex
+    # Условие повторяется в UPDATE: задачу, которую успел занять
+    # другой обработчик, он и выполнит.
+    ready.filter(pk__in=ids).update(
+        status=Task.RUNNING, worker=worker,
+        locked_until=now + timedelta(seconds=settings.TASKS_LEASE),
+    )
+    return list(Task.objects.filter(worker=worker, status=Task.RUNNING))
+
+
+def _finish(item, error=None):
+    item.attempts += 1
+    # У завершённых задач run_at — время завершения, по нему их
+    # удаляет prune_finished().
+    if error is None:
+        item.status, item.last_error = Task.DONE, ''
+        item.run_at = timezone.now()
+    elif item.attempts < settings.TASKS_MAX_ATTEMPTS:
+        delay = settings.TASKS_RETRY_DELAY * 2 ** (item.attempts - 1)
+        item.status, item.last_error = Task.QUEUED, error
+        item.run_at = timezone.now() + timedelta(seconds=delay)
+    else:
+        item.status, item.last_error = Task.FAILED, error
+        item.run_at = timezone.now()
+    item.locked_until = None
+    Task.objects.filter(pk=item.pk, worker=item.worker).update(
+        status=item.status, attempts=item.attempts, run_at=item.run_at,
+        locked_until=None, last_error=item.last_error,
+    )
+
+
+def run_task(item):
+    """Выполнить занятую задачу; возвращает True при успехе."""
+    try:
+        function = _registry[item.name]
+        with transaction.atomic():
+            function(*json.loads(item.payload))
+    except Exception:
+        logger.exception('Задача %s #%s упала', item.name, item.pk)
+        _finish(item, traceback.format_exc())
+        return False
+    _finish(item)
+    return True
+
+
+def prune_finished(days=None, now=None):
+    """Удалить задачи, завершённые больше days дней назад.
+
+    По умолчанию days = TASKS_KEEP_DAYS; возвращает число удалённых.
+    """
+    days = settings.TASKS_KEEP_DAYS if days is None else days
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    deleted, _ = Task.objects.filter(
+        status__in=(Task.DONE, Task.FAILED), run_at__lt=cutoff,
+    ).delete()
+    return deleted
+
+
+def run_pending(batch_size=None):
+    """Выполнить одну пачку задач; возвращает (успешных, упавших)."""
+    done = failed = 0
+    for item in claim(batch_size):
+        if run_task(item):
+            done += 1
+        else:
+            failed += 1
+    return done, failed
@@ -0,0 +1,55 @@
+"""Панель страниц без ссылки на каждую страницу.
+
+Выводятся первые и последние PAGINATOR_ON_ENDS страниц и по
+PAGINATOR_ON_EACH_SIDE страниц вокруг текущей, остальные заменяются
+многоточием, так что размер панели не зависит от числа записей.
+В режиме курсора панель содержит только переходы назад и вперёд.
+"""
+from django import template
+from django.conf import settings
+
+register = template.Library()
+
+
+def page_window(number, num_pages, on_each_side=2, on_start=1, on_end=1):
+    """Номера страниц для панели; None — пропуск между ними.
+
+    on_start и on_end — сколько первых и последних страниц показывать.
+    Пропуск ставится, только если скрывает больше одной страницы.
+    """
+    start = max(number - on_each_side, 1)
+    end = min(number + on_each_side, num_pages)
+    if start <= on_start + 2:
+        start = 1
+    if end >= num_pages - on_end - 1:
+        end = num_pages
+    pages = []
+    if start > 1:
+        pages += [*range(1, on_start + 1), None]
+    pages += range(start, end + 1)
+    if end < num_pages:
+        pages += [None, *range(num_pages - on_end + 1, num_pages + 1)]
+    return pages
+
+
+@register.inclusion_tag('includes/paginator.html', takes_context=True)
+def pagination_bar(context, page_obj):
+    pages = []
+    if not getattr(page_obj, 'cursor_mode', False):
+        paginator = page_obj.paginator
+        # При приближённом счёте последние страницы неизвестны,
+        # первые показываются как обычно.
+        approximate = getattr(paginator, 'is_approximate', False)
+        pages = page_window(
+            page_obj.number, paginator.num_pages,
+            settings.PAGINATOR_ON_EACH_SIDE,
+            on_start=settings.PAGINATOR_ON_ENDS,
+            on_end=0 if approximate else settings.PAGINATOR_ON_ENDS,
+        )
+        if approximate and pages[-1] == paginator.num_pages:
+            pages.append(None)
+    return {
+        'page_obj': page_obj,
+        'pages': pages,
+        'pagination_query': context.get('pagination_query', ''),
+    }
@@ -1,6 +1,34 @@
+import asyncio
+import time
+from datetime import timedelta
 from http import HTTPStatus
 
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.core.signals import request_finished
+from django.template import Context, Template
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import (
+    RequestFactory, SimpleTestCase, TestCase, override_settings,
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Post
+
+from . import profiling, tasks
+from .asgi import WsgiToAsgi
+from .cache import (
+    CacheNamespace, bump_generation, generational_cache_page, get_generation,
+)
+from .fake_redis import FakeRedisServer
+from .models import Task
+from .redis_cache import RedisCache
+from .templatetags.pagination import page_window
+from .tiered_cache import TieredCache
+
+User = get_user_model()
 
 
 class ViewTestClass(TestCase):
@@ -8,3 +36,494 @@ class ViewTestClass(TestCase):
         response = self.client.get('/nonexist-page/')
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class GenerationalCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+        @generational_cache_page('test', lock_timeout=0.1)
+        def view(request):
+            self.calls += 1
+            return HttpResponse(str(self.calls))
+
+        self.view = view
+        self.factory = RequestFactory()
+
+    def test_page_is_cached_until_generation_bump(self):
+        self.view(self.factory.get('/'))
+        self.view(self.factory.get('/'))
+        self.assertEqual(self.calls, 1)
+        bump_generation('test')
+        self.assertEqual(self.view(self.factory.get('/')).content, b'2')
+
+    def test_locked_page_is_rendered_after_wait(self):
+        generation = get_generation('test')
+        CacheNamespace('test').add('page-lock:/', 1)
+        self.assertEqual(self.view(self.factory.get('/')).content, b'1')
+        self.assertEqual(get_generation('test'), generation)
+
+
+class RedisCacheTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = FakeRedisServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+        super().tearDownClass()
+
+    def make_cache(self):
+        return RedisCache(self.server.url, {'KEY_PREFIX': 'test'})
+
+    def setUp(self):
+        self.cache = self.make_cache()
+        self.cache.clear()
+
+    def test_values_round_trip(self):
+        self.cache.set('text', 'значение')
+        self.cache.set('number', 5)
+        self.cache.set_many({'a': [1, 2], 'b': None})
+        self.assertEqual(self.cache.get('text'), 'значение')
+        self.assertEqual(self.cache.incr('number', 2), 7)
+        self.assertEqual(
+            self.cache.get_many(['a', 'missing']), {'a': [1, 2]}
+        )
+        self.cache.delete_many(['a', 'text'])
+        self.assertIsNone(self.cache.get('text'))
+
+    def test_add_incr_and_expiry(self):
+        self.assertTrue(self.cache.add('key', 1, timeout=0.05))
+        self.assertFalse(self.cache.add('key', 2))
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+        self.assertFalse(self.cache.has_key('missing'))
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get('key'))
+        self.cache.set('gone', 1, timeout=0)
+        self.assertFalse(self.cache.has_key('gone'))
+
+    def test_clear_keeps_other_prefixes(self):
+        other = RedisCache(self.server.url, {'KEY_PREFIX': 'other'})
+        other.set('kept', 1)
+        for number in range(30):
+            self.cache.set(f'key-{number}', number)
+        self.cache.clear()
+        self.assertEqual(self.cache.get_many(['key-0', 'key-29']), {})
+        self.assertEqual(other.get('kept'), 1)
+
+    def test_unreachable_server_is_a_miss(self):
+        host = self.server.server_address[0]
+        dead = RedisCache(
+            f'redis://{host}:1/0', {'OPTIONS': {'SOCKET_TIMEOUT': 0.1}}
+        )
+        with self.assertLogs('core.redis_cache', 'WARNING'):
+            self.assertEqual(dead.get('key', 'нет'), 'нет')
+            self.assertEqual(dead.get_many(['key']), {})
+            self.assertFalse(dead.has_key('key'))
+            dead.set('key', 1)
+            dead.set_many({'key': 1})
+            dead.delete('key')
+            self.assertTrue(dead.add('lock', 1))
+            with self.assertRaises(ValueError):
+                dead.incr('key')
+
+    def test_processes_share_values(self):
+        self.cache.set('shared', 'из первого процесса')
+        self.assertEqual(
+            self.make_cache().get('shared'), 'из первого процесса'
+        )
+
+    def test_page_generation_is_shared(self):
+        calls = []
+
+        @generational_cache_page('test')
+        def view(request):
+            calls.append(1)
+            return HttpResponse(str(len(calls)))
+
+        caches = {'default': {
+            'BACKEND': 'core.redis_cache.RedisCache',
+            'LOCATION': self.server.url,
+        }}
+        request = RequestFactory().get('/')
+        with self.settings(CACHES=caches):
+            view(request)
+            self.assertEqual(view(request).content, b'1')
+            bump_generation('test')
+        # Новый обработчик кэшей — как в соседнем процессе.
+        with self.settings(CACHES=caches):
+            self.assertEqual(view(request).content, b'2')
+            with self.settings(CACHE_NAMESPACE_VERSIONS={'test': 2}):
+                self.assertEqual(view(request).content, b'3')
+
+
+@override_settings(CACHES={'default': {
+    'BACKEND': 'core.redis_cache.RedisCache',
+    'LOCATION': 'redis://127.0.0.1:1/0',
+    'OPTIONS': {'SOCKET_TIMEOUT': 0.1},
+}})
+class RedisOutageTest(TestCase):
+    def test_pages_are_built_without_cache(self):
+        Post.objects.create(
+            text='Пост без кэша',
+            author=User.objects.create_user(username='outage'),
+        )
+        with self.assertLogs('core.redis_cache', 'WARNING'):
+            response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Пост без кэша')
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tiered-test',
+    },
+})
+class TieredCacheTest(SimpleTestCase):
+    def make_cache(self, process, **options):
+        options = dict(
+            {'LOCAL_PREFIXES': ('hot:',), 'STAMP_INTERVAL': 0}, **options
+        )
+        return TieredCache(f'{self.id()}-{process}', {'OPTIONS': options})
+
+    def setUp(self):
+        self.first = self.make_cache('first')
+        self.second = self.make_cache('second')
+        self.first.clear()
+
+    def test_hot_keys_are_read_from_process(self):
+        self.first.set('hot:group', 'группа')
+        self.first.set('lock', 1)
+        self.first.shared.set('hot:group', 'изменено в обход')
+        self.assertEqual(self.first.get('hot:group'), 'группа')
+        self.assertEqual(self.first.get('lock'), 1)
+        self.assertEqual(self.second.get('hot:group'), 'изменено в обход')
+        self.assertIsNone(self.first.get('hot:missing'))
+        stats = self.first.tier_stats()
+        self.assertEqual(
+            (stats['local_hits'], stats['shared_hits'], stats['misses']),
+            (1, 1, 1),
+        )
+        self.assertEqual(stats['local_ratio'], round(1 / 3, 3))
+
+    def test_change_in_one_process_reaches_another(self):
+        self.first.set('hot:generation', 1)
+        self.assertEqual(self.second.get('hot:generation'), 1)
+        self.first.incr('hot:generation')
+        self.assertEqual(self.second.get('hot:generation'), 2)
+        self.first.delete('hot:generation')
+        self.assertIsNone(self.second.get('hot:generation'))
+
+    def test_each_hit_gets_own_copy(self):
+        self.first.set('hot:page', HttpResponse('страница'))
+        first, second = self.first.get('hot:page'), self.first.get('hot:page')
+        self.assertEqual(self.first.tier_stats()['local_hits'], 2)
+        self.assertIsNot(first, second)
+        self.assertEqual(second.content, 'страница'.encode())
+
+    def test_stamp_is_scoped_to_prefix(self):
+        first = self.make_cache('first', LOCAL_PREFIXES=('hot:', 'card:'))
+        second = self.make_cache('second', LOCAL_PREFIXES=('hot:', 'card:'))
+        first.set_many({'hot:generation': 1, 'card:1': 'карточка'})
+        second.get_many(['hot:generation', 'card:1'])
+        first.shared.set('card:1', 'изменено в обход')
+        first.incr('hot:generation')
+        self.assertEqual(second.get('hot:generation'), 2)
+        self.assertEqual(second.get('card:1'), 'карточка')
+        first.delete('card:1')
+        self.assertIsNone(second.get('card:1'))
+
+    def test_stale_value_lives_until_stamp_check(self):
+        second = self.make_cache('slow', STAMP_INTERVAL=60)
+        self.first.set('hot:generation', 1)
+        second.get('hot:generation')
+        self.first.incr('hot:generation')
+        self.assertEqual(second.get('hot:generation'), 1)
+
+    def test_local_tier_is_bounded(self):
+        cache = self.make_cache('small', MAX_ENTRIES=2)
+        cache.set_many({'hot:a': 1, 'hot:b': 2})
+        cache.get('hot:a')
+        cache.set('hot:c', 3)
+        self.assertEqual(cache.tier_stats()['local_entries'], 2)
+        cache.get_many(['hot:a', 'hot:b', 'hot:c'])
+        stats = cache.tier_stats()
+        self.assertEqual((stats['local_hits'], stats['shared_hits']), (3, 1))
+
+
+class PaginationBarTest(SimpleTestCase):
+    def test_page_window(self):
+        cases = {
+            (1, 1): [1],
+            (1, 5): [1, 2, 3, 4, 5],
+            (1, 7): [1, 2, 3, None, 7],
+            (1, 100): [1, 2, 3, None, 100],
+            (5, 100): [1, 2, 3, 4, 5, 6, 7, None, 100],
+            (50, 100): [1, None, 48, 49, 50, 51, 52, None, 100],
+            (100, 100): [1, None, 98, 99, 100],
+        }
+        for (number, num_pages), expected in cases.items():
+            with self.subTest(number=number, num_pages=num_pages):
+                self.assertEqual(page_window(number, num_pages), expected)
+
+    def test_bar_size_does_not_depend_on_page_count(self):
+        page = Paginator(range(100000), 10).page(500)
+        html = Template(
+            '{% load pagination %}{% pagination_bar page_obj %}'
+        ).render(Context({'page_obj': page, 'pagination_query': 'q=x&'}))
+        self.assertEqual(html.count('page=10000'), 1)
+        self.assertEqual(html.count('?q=x&amp;page='), 7)
+        self.assertNotIn('page=400', html)
+
+    def test_approximate_bar_keeps_first_page(self):
+        paginator = Paginator(range(1000), 10)
+        paginator.is_approximate = True
+        html = Template(
+            '{% load pagination %}{% pagination_bar page_obj %}'
+        ).render(Context({'page_obj': paginator.page(50)}))
+        self.assertIn('?page=1"', html)
+        self.assertIn('?page=52"', html)
+        self.assertNotIn('?page=100"', html)
+        self.assertEqual(
+            page_window(50, 100, on_start=1, on_end=0),
+            [1, None, 48, 49, 50, 51, 52, None],
+        )
+
+
+calls = []
+
+
+@tasks.task('core.test.record')
+def record(value):
+    calls.append(value)
+
+
+@tasks.task('core.test.fail')
+def fail(value):
+    raise RuntimeError(value)
+
+
+@override_settings(
+    TASKS_EXECUTOR='database', TASKS_MAX_ATTEMPTS=2, TASKS_RETRY_DELAY=0,
+)
+class TaskQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    @override_settings(TASKS_EXECUTOR='local')
+    def test_local_executor_runs_task_at_once(self):
+        self.assertIsNone(tasks.enqueue('core.test.record', 1))
+        self.assertEqual(calls, [1])
+        self.assertFalse(Task.objects.exists())
+
+    def test_task_runs_in_worker(self):
+        item = tasks.enqueue('core.test.record', 'a')
+        self.assertEqual(calls, [])
+        self.assertEqual(tasks.run_pending(), (1, 0))
+        self.assertEqual(calls, ['a'])
+        item.refresh_from_db()
+        self.assertEqual((item.status, item.attempts), (Task.DONE, 1))
+        self.assertEqual(tasks.run_pending(), (0, 0))
+
+    def test_pending_key_is_not_duplicated(self):
+        first = tasks.enqueue('core.test.record', 1, key='same')
+        self.assertEqual(tasks.enqueue('core.test.record', 1, key='same'),
+                         first)
+        tasks.run_pending()
+        tasks.enqueue('core.test.record', 1, key='same')
+        self.assertEqual(Task.objects.filter(key='same').count(), 2)
+
+    def test_failed_task_is_retried_then_given_up(self):
+        item = tasks.enqueue('core.test.fail', 'сбой')
+        self.assertEqual(tasks.run_pending(), (0, 1))
+        item.refresh_from_db()
+        self.assertEqual((item.status, item.attempts), (Task.QUEUED, 1))
+        self.assertIn('сбой', item.last_error)
+        self.assertEqual(tasks.run_pending(), (0, 1))
+        item.refresh_from_db()
+        self.assertEqual((item.status, item.attempts), (Task.FAILED, 2))
+        self.assertEqual(tasks.run_pending(), (0, 0))
+
+    def test_batch_size_and_expired_lease(self):
+        for value in range(3):
+            tasks.enqueue('core.test.record', value)
+        claimed = tasks.claim(batch_size=2)
+        self.assertEqual(len(claimed), 2)
+        self.assertEqual(tasks.run_pending(), (1, 0))
+        # Обработчик первых двух задач пропал: после аренды их берёт
+        # следующий.
+        Task.objects.filter(status=Task.RUNNING).update(
+            locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(tasks.run_pending(), (2, 0))
+        self.assertEqual(sorted(calls), [0, 1, 2])
+
+    def test_expired_lease_counts_as_attempt(self):
+        item = tasks.enqueue('core.test.record', 'x')
+        expired = timezone.now() - timedelta(seconds=1)
+        for attempts, status in ((1, Task.QUEUED), (2, Task.FAILED)):
+            tasks.claim()
+            Task.objects.filter(pk=item.pk).update(locked_until=expired)
+            tasks.reclaim_expired()
+            item.refresh_from_db()
+            self.assertEqual((item.status, item.attempts), (status, attempts))
+            self.assertEqual(item.worker, '')
+        self.assertEqual(tasks.run_pending(), (0, 0))
+        self.assertEqual(calls, [])
+
+    def test_old_finished_tasks_are_pruned(self):
+        tasks.enqueue('core.test.record', 1)
+        tasks.enqueue('core.test.fail', 2)
+        tasks.run_pending()
+        tasks.run_pending()
+        waiting = tasks.enqueue('core.test.record', 3)
+        Task.objects.update(run_at=timezone.now() - timedelta(days=8))
+        with override_settings(TASKS_KEEP_DAYS=7):
+            self.assertEqual(tasks.prune_finished(), 2)
+        self.assertEqual(list(Task.objects.all()), [waiting])
+
+
+def echo_application(environ, start_response):
+    start_response('201 Created', [('X-Path', environ['PATH_INFO'])])
+    return [
+        environ['QUERY_STRING'].encode(), b'|',
+        environ.get('HTTP_X_TAG', '').encode(), b'|',
+        environ['wsgi.input'].read(),
+    ]
+
+
+class WsgiToAsgiTest(SimpleTestCase):
+    def call(self, scope, messages, wsgi_application=echo_application):
+        application = WsgiToAsgi(wsgi_application, threads=1)
+        self.sent = sent = []
+        messages = iter(messages)
+
+        async def receive():
+            return next(messages)
+
+        async def send(message):
+            sent.append(message)
+
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(application(scope, receive, send))
+        finally:
+            loop.close()
+        return sent
+
+    def test_request_is_passed_to_wsgi(self):
+        scope = {
+            'type': 'http', 'method': 'POST', 'path': '/пост/',
+            'query_string': b'page=2',
+            'headers': [(b'x-tag', b'a'), (b'x-tag', b'b')],
+        }
+        sent = self.call(scope, [
+            {'type': 'http.request', 'body': b'te', 'more_body': True},
+            {'type': 'http.request', 'body': b'xt'},
+        ])
+        self.assertEqual(sent[0]['status'], 201)
+        self.assertEqual(
+            sent[0]['headers'], [(b'x-path', '/пост/'.encode())]
+        )
+        body = b''.join(message['body'] for message in sent[1:])
+        self.assertEqual(body, b'page=2|a,b|text')
+        self.assertFalse(sent[-1].get('more_body'))
+
+    def test_streaming_response_is_sent_by_parts(self):
+        seen = []
+
+        def parts():
+            yield b'a'
+            # Первая часть уже у клиента, пока строится вторая.
+            seen.append([message.get('body') for message in self.sent])
+            yield b'b'
+
+        def application(environ, start_response):
+            start_response('200 OK', [])
+            return StreamingHttpResponse(parts())
+
+        closed = []
+
+        def finished(**kwargs):
+            closed.append(1)
+
+        scope = {'type': 'http', 'method': 'GET', 'path': '/'}
+        request_finished.connect(finished)
+        try:
+            sent = self.call(scope, [{'type': 'http.request'}], application)
+        finally:
+            request_finished.disconnect(finished)
+        self.assertEqual(seen, [[None, b'a']])
+        self.assertEqual(
+            [message.get('body') for message in sent], [None, b'a', b'b', b''],
+        )
+        self.assertEqual(closed, [1])
+
+    def test_disconnected_client_gets_nothing(self):
+        scope = {'type': 'http', 'method': 'GET', 'path': '/'}
+        self.assertEqual(self.call(scope, [{'type': 'http.disconnect'}]), [])
+
+    def test_lifespan(self):
+        sent = self.call({'type': 'lifespan'}, [
+            {'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'},
+        ])
+        self.assertEqual(
+            [message['type'] for message in sent],
+            ['lifespan.startup.complete', 'lifespan.shutdown.complete'],
+        )
+
+
+@override_settings(PROFILING_SAMPLE_RATE=1)
+class ProfilingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='profiled')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        Post.objects.create(text='Пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        profiling.clear()
+
+    def views(self):
+        return {row['view']: row for row in profiling.report()['views']}
+
+    def test_request_is_profiled(self):
+        response = self.client.get(
+            reverse('posts:profile', args=[self.author.username])
+        )
+        row = self.views()['posts:profile']
+        self.assertEqual(row['requests'], 1)
+        self.assertGreater(row['queries_max'], 0)
+        self.assertGreater(row['db_ms_avg'], 0)
+        self.assertGreater(row['template_ms_avg'], 0)
+        self.assertEqual(row['cache_misses'], 1)
+        self.assertEqual(row['size_avg'], len(response.content))
+
+    def test_page_cache_hit_is_counted(self):
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        row = self.views()['posts:index']
+        self.assertEqual(row['cache_hits'], 1)
+        self.assertEqual(row['requests'], 2)
+
+    @override_settings(PROFILING_SAMPLE_RATE=0)
+    def test_unsampled_request_is_not_recorded(self):
+        self.client.get(reverse('posts:index'))
+        self.assertEqual(profiling.report()['samples'], 0)
+
+    def test_report_is_for_staff_only(self):
+        url = reverse('core:profiling')
+        self.client.get(reverse('posts:profile', args=[self.author.username]))
+        self.client.force_login(self.author)
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(self.staff)
+        report = self.client.get(url, {'format': 'json'}).json()
+        views = [row['view'] for row in report['views']]
+        self.assertIn('posts:profile', views)
+        self.assertContains(self.client.get(url), 'posts:profile')
@@ -0,0 +1,272 @@
+"""Двухуровневый кэш: LRU в памяти процесса перед общим кэшем.
+
+Горячие ключи (счётчик поколения, карточки постов, группы) читаются из
+памяти процесса без похода по сети или на диск. Запись идёт сразу в
+оба уровня. Локально хранятся только ключи с префиксами LOCAL_PREFIXES
+и не дольше LOCAL_TIMEOUT секунд; блокировки и прочие служебные ключи
+проходят прямо в общий кэш. Как и LocMemCache, уровень хранит
+значения в pickle: каждый вызов получает свою копию, и закэшированный
+ответ не делят между собой потоки, которые его изменяют.
+
+У каждого префикса из LOCAL_PREFIXES свой штамп версии в общем
+кэше. Когда процесс удаляет или увеличивает локально хранимый ключ, он
+увеличивает штамп его префикса. Остальные процессы сверяют штампы не
+чаще раза в STAMP_INTERVAL секунд и при смене штампа забывают только
+ключи этого префикса, так что устаревшее значение живёт в соседнем
+процессе не дольше этого интервала, а смена поколения не выбрасывает
+карточки и группы.
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+STAMP_KEY = 'tiered-cache-stamp'
+
+
+class _LocalTier:
+    """Локальный уровень; один на процесс, как хранилище LocMemCache."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        # Последний увиденный штамп каждого префикса.
+        self.stamps = {}
+        self.checked = 0.0
+        self.local_hits = self.shared_hits = self.misses = 0
+
+
+# Django создаёт объект кэша в каждом потоке, а уровень нужен общий.
+_tiers = {}
+_tiers_lock = threading.Lock()
+
+
+class TieredCache(BaseCache):
+    """OPTIONS: SHARED — псевдоним общего кэша в CACHES, LOCAL_PREFIXES,
+    MAX_ENTRIES, LOCAL_TIMEOUT и STAMP_INTERVAL."""
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = options.get('SHARED', 'shared')
+        self.prefixes = tuple(options.get('LOCAL_PREFIXES', ('',)))
+        self.max_entries = options.get('MAX_ENTRIES', 1000)
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 30)
+        self.stamp_interval = options.get('STAMP_INTERVAL', 1)
+        self.stamp_keys = {
+            prefix: f'{STAMP_KEY}:{prefix}' for prefix in self.prefixes
+        }
+        with _tiers_lock:
+            self._tier = _tiers.setdefault(location, _LocalTier())
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def _is_local(self, key):
+        return key.startswith(self.prefixes)
+
+    def _prefix_of(self, key):
+        for prefix in self.prefixes:
+            if key.startswith(prefix):
+                return prefix
+        return None
+
+    def _version(self, version):
+        return self.shared.version if version is None else version
+
+    def _forget(self, prefixes):
+        """Забыть локальные ключи префиксов prefixes; под блокировкой."""
+        entries = self._tier.entries
+        for entry in [entry for entry in entries
+                      if self._prefix_of(entry[0]) in prefixes]:
+            del entries[entry]
+
+    def _sync_stamp(self):
+        now = time.monotonic()
+        if now - self._tier.checked < self.stamp_interval:
+            return
+        found = self.shared.get_many(list(self.stamp_keys.values()))
+        stamps = {
+            prefix: found.get(key) for prefix, key in self.stamp_keys.items()
+        }
+        with self._tier.lock:
+            self._tier.checked = now
+            changed = {
+                prefix for prefix, stamp in stamps.items()
+                if stamp != self._tier.stamps.get(prefix)
+            }
+            if changed:
+                self._forget(changed)
+            self._tier.stamps = stamps
+
+    def _bump_stamp(self, prefixes):
+        for prefix in prefixes:
+            key = self.stamp_keys[prefix]
+            try:
+                stamp = self.shared.incr(key)
+            except ValueError:
+                stamp = 1
+                if not self.shared.add(key, stamp, timeout=None):
+                    stamp = self.shared.incr(key)
+            with self._tier.lock:
+                # Штамп сдвинулся больше чем на единицу — его успел
+                # увеличить и другой процесс.
+                seen = self._tier.stamps.get(prefix)
+                if seen is None or stamp != seen + 1:
+                    self._forget({prefix})
+                self._tier.stamps[prefix] = stamp
+
+    def _local_get(self, key, version):
+        version = self._version(version)
+        with self._tier.lock:
+            entry = self._tier.entries.get((key, version))
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires <= time.monotonic():
+                del self._tier.entries[(key, version)]
+                return None
+            self._tier.entries.move_to_end((key, version))
+        return pickle.loads(value), expires
+
+    def _local_set(self, key, value, version, timeout=DEFAULT_TIMEOUT):
+        if not self._is_local(key):
+            return
+        self._sync_stamp()
+        version = self._version(version)
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        ttl = self.local_timeout
+        if timeout is not None:
+            ttl = min(ttl, timeout)
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        entries = self._tier.entries
+        with self._tier.lock:
+            entries[(key, version)] = (pickled, time.monotonic() + ttl)
+            entries.move_to_end((key, version))
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+    def _local_delete(self, keys, version):
+        """Удалить ключи из локального уровня; возвращает их префиксы."""
+        keys = [key for key in keys if self._is_local(key)]
+        version = self._version(version)
+        with self._tier.lock:
+            for key in keys:
+                self._tier.entries.pop((key, version), None)
+        return {self._prefix_of(key) for key in keys}
+
+    def _count(self, local=0, shared=0, missed=0):
+        with self._tier.lock:
+            self._tier.local_hits += local
+            self._tier.shared_hits += shared
+            self._tier.misses += missed
+
+    def get(self, key, default=None, version=None):
+        self._sync_stamp()
+        entry = self._local_get(key, version)
+        if entry is not None:
+            self._count(local=1)
+            return entry[0]
+        value = self.shared.get(key, version=version)
+        if value is None:
+            self._count(missed=1)
+            return default
+        self._count(shared=1)
+        self._local_set(key, value, version)
+        return value
+
+    def get_many(self, keys, version=None):
+        self._sync_stamp()
+        found = {}
+        remote = []
+        for key in keys:
+            entry = self._local_get(key, version)
+            if entry is None:
+                remote.append(key)
+            else:
+                found[key] = entry[0]
+        fetched = {}
+        if remote:
+            fetched = self.shared.get_many(remote, version=version)
+        for key, value in fetched.items():
+            self._local_set(key, value, version)
+        found.update(fetched)
+        self._count(
+            local=len(found) - len(fetched), shared=len(fetched),
+            missed=len(remote) - len(fetched),
+        )
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        self._local_set(key, value, version, timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version=version)
+        for key, value in data.items():
+            if key not in failed:
+                self._local_set(key, value, version, timeout)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self._local_set(key, value, version, timeout)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version=version)
+
+    def has_key(self, key, version=None):
+        self._sync_stamp()
+        if self._local_get(key, version) is not None:
+            return True
+        return self.shared.has_key(key, version=version)
+
+    def delete(self, key, version=None):
+        self.shared.delete(key, version=version)
+        self._bump_stamp(self._local_delete([key], version))
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.shared.delete_many(keys, version=version)
+        self._bump_stamp(self._local_delete(keys, version))
+
+    def incr(self, key, delta=1, version=None):
+        value = self.shared.incr(key, delta, version=version)
+        prefixes = self._local_delete([key], version)
+        if prefixes:
+            self._bump_stamp(prefixes)
+            self._local_set(key, value, version)
+        return value
+
+    def clear(self):
+        self.shared.clear()
+        with self._tier.lock:
+            self._tier.entries.clear()
+        self._bump_stamp(self.prefixes)
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
+
+    def tier_stats(self):
+        """Попадания по уровням с начала работы процесса."""
+        tier = self._tier
+        with tier.lock:
+            lookups = tier.local_hits + tier.shared_hits + tier.misses
+            stats = {
+                'lookups': lookups,
+                'local_hits': tier.local_hits,
+                'shared_hits': tier.shared_hits,
+                'misses': tier.misses,
+                'local_entries': len(tier.entries),
+            }
+        for name in ('local', 'shared'):
+            hits = stats[f'{name}_hits']
+            stats[f'{name}_ratio'] = round(hits / lookups, 3) if lookups else 0
+        return stats
@@ -1,5 +1,9 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from django.shortcuts import render
 
+from . import profiling
+
 app_name = 'core'
 
 
@@ -18,3 +22,13 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+@staff_member_required
+def profiling_report(request):
+    if request.method == 'POST':
+        profiling.clear()
+    report = profiling.report()
+    if request.GET.get('format') == 'json':
+        return JsonResponse(report)
+    return render(request, 'core/profiling.html', {'report': report})
@@ -0,0 +1,80 @@
+"""JSON API только для чтения: ленты и пост.
+
+Ленты листаются по курсору (?cursor= из next_cursor/previous_cursor).
+Каждый ответ несёт слабый ETag и Last-Modified, посчитанные по
+постам страницы; на условный запрос с теми же валидаторами приходит
+304 без сериализации ответа.
+"""
+from django.conf import settings
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_GET
+
+from .conditional import not_modified, page_validators, set_validators
+from .feed import follow_feed
+from .models import Group, Post, User
+from .paginator import CursorPaginator
+from .serializers import serialize_page, serialize_post
+
+
+def feed_response(request, posts, *etag_parts, **paginator_kwargs):
+    cursor = request.GET.get('cursor', '')
+    paginator = CursorPaginator(
+        posts, settings.PAGINATOR_DEFAULT_SIZE, **paginator_kwargs
+    )
+    page = paginator.get_cursor_page(cursor)
+    etag, last_modified = page_validators(
+        page, cursor, page.has_next(), page.has_previous(), *etag_parts
+    )
+    response = not_modified(request, etag, last_modified)
+    if response is None:
+        response = JsonResponse(serialize_page(page))
+        set_validators(response, etag, last_modified)
+    # Клиент хранит ответ, но перед использованием сверяет ETag.
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+@require_GET
+def index(request):
+    return feed_response(request, Post.objects.for_feed())
+
+
+@require_GET
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return feed_response(request, group.posts.for_feed())
+
+
+@require_GET
+def profile(request, username):
+    author = get_object_or_404(User, username=username)
+    return feed_response(request, author.posts.for_feed())
+
+
+@require_GET
+def post_detail(request, post_id):
+    post = get_object_or_404(Post.objects.for_feed(), pk=post_id)
+    etag, last_modified = page_validators([post])
+    response = not_modified(request, etag, last_modified)
+    if response is None:
+        response = set_validators(
+            JsonResponse(serialize_post(post)), etag, last_modified
+        )
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+@require_GET
+def follow_index(request):
+    if not request.user.is_authenticated:
+        return JsonResponse(
+            {'detail': 'Нужно войти в систему.'}, status=401
+        )
+    response = feed_response(
+        request, follow_feed(request.user), request.user.pk,
+        order_field='feed_date', tiebreak_field='feed_post',
+    )
+    patch_cache_control(response, private=True)
+    return response
@@ -0,0 +1,144 @@
+"""Валидаторы ETag и Last-Modified для лент и страниц постов.
+
+Валидатор считается одним агрегатным запросом: дата самого нового
+поста, последняя правка, число постов и комментариев к ним и время
+последнего изменения комментариев, плюс показанные на странице поля
+группы, автора или счётчиков. Last-Modified — самое позднее из времён
+правки, комментариев и счётчиков (MODIFIED_FIELDS). В ETag
+входит и поколение 'posts': оно меняется при переименовании авторов и
+правке групп, которые показаны в карточках, но не в агрегатах. Если
+клиент прислал совпадающий If-None-Match или If-Modified-Since, ответ
+304 отдаётся до запроса самой страницы.
+"""
+import hashlib
+from calendar import timegm
+from datetime import datetime, timezone
+
+from django.db.models import Count, Max, Sum
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import condition
+
+from core.cache import generation_changed, get_generation
+
+
+# Поля строки агрегатов со временем изменения показанных данных.
+MODIFIED_FIELDS = ('updated', 'commented', 'counters_changed')
+
+
+def post_stats(prefix=''):
+    """Агрегаты по постам; prefix — путь к постам, например 'posts__'."""
+    return {
+        'latest': Max(f'{prefix}pub_date'),
+        'updated': Max(f'{prefix}updated'),
+        'commented': Max(f'{prefix}commented'),
+        'count': Count(f'{prefix}id'),
+        'comments': Sum(f'{prefix}comment_count'),
+    }
+
+
+def make_etag(*parts):
+    key = repr(parts).encode()
+    return f'W/"{hashlib.md5(key).hexdigest()}"'
+
+
+def validators_from(row, *parts):
+    """ETag и время изменения по строке агрегатов с полем updated."""
+    last_modified = max(
+        (row[field] for field in MODIFIED_FIELDS if row.get(field)),
+        default=None,
+    )
+    return make_etag(sorted(row.items()), parts), last_modified
+
+
+def generation_validators(row, *parts):
+    """validators_from() с учётом поколения 'posts' и времени его смены."""
+    etag, last_modified = validators_from(
+        row, get_generation('posts'), *parts)
+    changed = generation_changed('posts')
+    if changed is not None:
+        changed = datetime.fromtimestamp(int(changed), timezone.utc)
+        if last_modified is None or changed > last_modified:
+            last_modified = changed
+    return etag, last_modified
+
+
+def _post_row(post):
+    group = post.group
+    return (
+        post.pk, post.updated, post.comment_count, post.commented,
+        post.thumbnails,
+        post.author.username, post.author.first_name, post.author.last_name,
+        group and (group.slug, group.title),
+    )
+
+
+def page_validators(posts, *parts):
+    """Слабый ETag и время изменения по уже прочитанным постам ответа.
+
+    В ETag входят все показанные поля постов, их авторов и групп, так
+    что проверка не требует запросов сверх самой страницы. parts — всё
+    остальное, от чего зависит ответ: курсор, соседние страницы.
+    """
+    rows = [_post_row(post) for post in posts]
+    last_modified = max(
+        (date for post in posts for date in (post.updated, post.commented)
+         if date),
+        default=None,
+    )
+    return make_etag(rows, parts), last_modified
+
+
+def _timestamp(last_modified):
+    if last_modified is None:
+        return None
+    return timegm(last_modified.utctimetuple())
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(_timestamp(last_modified))
+    return response
+
+
+def not_modified(request, etag, last_modified):
+    """Ответ 304 или None, если клиенту нужна страница целиком."""
+    response = get_conditional_response(
+        request, etag=etag, last_modified=_timestamp(last_modified)
+    )
+    if response is None:
+        return None
+    return set_validators(response, etag, last_modified)
+
+
+def conditional_page(compute, per_user=True):
+    """condition() для HTML-страницы с валидаторами из compute.
+
+    compute(request, *args, **kwargs) возвращает словарь агрегатов по
+    постам страницы (см. post_stats) и показанным рядом полям. Если
+    постов нет, валидаторов нет и страница строится как обычно.
+    Агрегаты считаются один раз на запрос, хотя condition() спрашивает
+    ETag и дату по отдельности.
+    Параметры пагинации входят в ETag, а пользователь — если страница
+    от него зависит (per_user): шапка с именем, кнопки автора.
+    """
+
+    def validators(request, *args, **kwargs):
+        if not hasattr(request, '_page_validators'):
+            row = compute(request, *args, **kwargs)
+            user = request.user.pk if per_user else None
+            request._page_validators = None if not row['count'] else (
+                generation_validators(row, user, request.get_full_path())
+            )
+        return request._page_validators
+
+    def etag(request, *args, **kwargs):
+        found = validators(request, *args, **kwargs)
+        return found and found[0]
+
+    def last_modified(request, *args, **kwargs):
+        found = validators(request, *args, **kwargs)
+        return found and found[1]
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
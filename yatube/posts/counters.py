@@ -0,0 +1,61 @@
+"""Денормализованные счётчики постов, комментариев и подписок.
+
+Сигналы меняют счётчики одним UPDATE с F-выражением и заодно ставят
+время изменения, по которому страницы отдают Last-Modified. Строка
+UserCounters создаётся при первом обращении подсчётом с нуля, поэтому
+пользователи, заведённые до появления счётчиков, не требуют миграции.
+Команда recount пересчитывает всё заново, если счётчики разошлись.
+"""
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Comment, Follow, Post, UserCounters
+
+
+def recount_user(user_id):
+    counters, _ = UserCounters.objects.update_or_create(
+        user_id=user_id,
+        defaults={
+            'post_count': Post.objects.filter(author_id=user_id).count(),
+            'comment_count': Comment.objects.filter(
+                author_id=user_id).count(),
+            'follower_count': Follow.objects.filter(
+                author_id=user_id).count(),
+            'following_count': Follow.objects.filter(
+                user_id=user_id).count(),
+        },
+    )
+    return counters
+
+
+def recount_post(post_id):
+    Post.objects.filter(pk=post_id).update(
+        comment_count=Comment.objects.filter(post_id=post_id).count(),
+        commented=timezone.now(),
+    )
+
+
+def get_user_counters(user):
+    try:
+        return user.counters
+    except UserCounters.DoesNotExist:
+        return recount_user(user.pk)
+
+
+def change_user_counter(user_id, field, delta):
+    rows = UserCounters.objects.filter(user_id=user_id)
+    if delta < 0:
+        # Разошедшийся счётчик не уходит ниже нуля.
+        rows = rows.filter(**{f'{field}__gt': 0})
+    updated = rows.update(
+        **{field: F(field) + delta}, changed=timezone.now())
+    if not updated and delta > 0:
+        recount_user(user_id)
+
+
+def change_post_comment_count(post_id, delta):
+    rows = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        rows = rows.filter(comment_count__gt=0)
+    rows.update(
+        comment_count=F('comment_count') + delta, commented=timezone.now())
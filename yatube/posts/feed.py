@@ -0,0 +1,155 @@
+"""Лента подписок, материализованная на запись (fan-out on write).
+
+Новый пост раскладывается в FeedEntry каждому подписчику автора, и
+follow_index читает ленту по индексу (user, pub_date, post) без
+соединения Follow с Post. У авторов, чьих подписчиков больше
+FOLLOW_FEED_FANOUT_LIMIT, посты не раскладываются: их лента собирается
+при чтении (fan-out on read).
+"""
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Q
+
+from .models import FeedEntry, Follow, Post
+
+# Подписчиков в одном запросе обрезки: держит число параметров SQL
+# в пределах лимита SQLite.
+TRIM_BATCH_SIZE = 500
+
+
+def is_heavy_author(author_id):
+    limit = settings.FOLLOW_FEED_FANOUT_LIMIT
+    followers = Follow.objects.filter(author_id=author_id)
+    return followers[:limit + 1].count() > limit
+
+
+def heavy_authors_followed_by(user):
+    """Авторы из подписок user, посты которых не раскладываются.
+
+    Число подписчиков берётся из UserCounters: запрос читает только
+    подписки user, а не всех подписчиков каждого автора.
+    """
+    return list(
+        Follow.objects.filter(
+            user=user,
+            author__counters__follower_count__gt=(
+                settings.FOLLOW_FEED_FANOUT_LIMIT),
+        ).values_list('author', flat=True)
+    )
+
+
+def trim_feeds(user_ids):
+    """Оставить в лентах не больше FOLLOW_FEED_MAX_ENTRIES записей.
+
+    Лишние записи всех лент удаляются одним запросом на пачку из
+    TRIM_BATCH_SIZE подписчиков: номер записи в ленте считает оконная
+    функция.
+    """
+    user_ids = list(user_ids)
+    table = FeedEntry._meta.db_table
+    for start in range(0, len(user_ids), TRIM_BATCH_SIZE):
+        batch = user_ids[start:start + TRIM_BATCH_SIZE]
+        placeholders = ', '.join(['%s'] * len(batch))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {table} WHERE id IN ('
+                f'SELECT id FROM (SELECT id, ROW_NUMBER() OVER ('
+                f'PARTITION BY user_id ORDER BY pub_date DESC, post_id DESC'
+                f') AS position FROM {table} '
+                f'WHERE user_id IN ({placeholders})) ranked '
+                f'WHERE position > %s)',
+                [*batch, settings.FOLLOW_FEED_MAX_ENTRIES],
+            )
+
+
+def fan_out_post(post):
+    if is_heavy_author(post.author_id):
+        return
+    follower_ids = list(
+        Follow.objects.filter(author_id=post.author_id)
+        .values_list('user_id', flat=True)
+    )
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+            for user_id in follower_ids
+        ),
+        ignore_conflicts=True,
+    )
+    trim_feeds(follower_ids)
+
+
+def add_author_to_feed(user_id, author_id):
+    """Дописать в ленту последние посты автора после подписки."""
+    if is_heavy_author(author_id):
+        return
+    posts = (
+        Post.objects.filter(author_id=author_id)
+        .order_by('-pub_date', '-pk')
+        .values_list('pk', 'pub_date')[:settings.FOLLOW_FEED_MAX_ENTRIES]
+    )
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+            for pk, pub_date in posts
+        ),
+        ignore_conflicts=True,
+    )
+    trim_feeds([user_id])
+
+
+def remove_author_from_feed(user_id, author_id):
+    FeedEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def reconcile_author(author_id):
+    """Привести записи лент к тому, тяжёлый ли сейчас автор.
+
+    Когда автор становится тяжёлым, его записи больше не нужны: посты
+    читаются при открытии ленты. Когда перестаёт — его посты заново
+    раскладываются всем подписчикам.
+    """
+    if is_heavy_author(author_id):
+        FeedEntry.objects.filter(post__author_id=author_id).delete()
+        return
+    follower_ids = Follow.objects.filter(author_id=author_id).values_list(
+        'user_id', flat=True)
+    for user_id in follower_ids.iterator():
+        add_author_to_feed(user_id, author_id)
+
+
+def crossed_fanout_limit(author_id, followed):
+    """Пересекла ли только что подписка (или отписка) порог тяжести."""
+    limit = settings.FOLLOW_FEED_FANOUT_LIMIT
+    followers = Follow.objects.filter(author_id=author_id)
+    count = followers[:limit + 2].count()
+    return count == (limit + 1 if followed else limit)
+
+
+def rebuild_feed(user):
+    FeedEntry.objects.filter(user=user).delete()
+    for author_id in Follow.objects.filter(user=user).values_list(
+            'author_id', flat=True):
+        add_author_to_feed(user.pk, author_id)
+
+
+def follow_feed(user):
+    """Посты ленты подписок user: материализованные и тяжёлых авторов.
+
+    Ключи сортировки feed_date и feed_post берутся из FeedEntry, чтобы
+    страница читалась по индексу (user, pub_date, post) без сортировки.
+    """
+    heavy = heavy_authors_followed_by(user)
+    if not heavy:
+        return Post.objects.for_feed().filter(
+            feed_entries__user=user
+        ).annotate(
+            feed_date=F('feed_entries__pub_date'),
+            feed_post=F('feed_entries__post'),
+        )
+    entries = FeedEntry.objects.filter(user=user).values('post')
+    return Post.objects.for_feed().filter(
+        Q(pk__in=entries) | Q(author__in=heavy)
+    ).annotate(feed_date=F('pub_date'), feed_post=F('pk'))
@@ -1,5 +1,7 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
+from .images import process_image
 from .models import Post, Comment
 
 
@@ -12,6 +14,22 @@ class PostForm(forms.ModelForm):
             'group': ('Группа постов, где вы хотите разместить записи'),
         }
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if image is False:
+            self.set_image_info(None, None, None)
+        # Уже сохранённая картинка не обрабатывается повторно.
+        if not isinstance(image, UploadedFile):
+            return image
+        image, *info = process_image(image)
+        self.set_image_info(*info)
+        return image
+
+    def set_image_info(self, width, height, size):
+        self.instance.image_width = width
+        self.instance.image_height = height
+        self.instance.image_size = size
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
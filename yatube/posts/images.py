@@ -0,0 +1,93 @@
+"""Обработка картинок постов при загрузке.
+
+Картинка уменьшается до POST_IMAGE_MAX_SIZE, поворачивается по метке
+EXIF и пересохраняется без метаданных: JPEG для непрозрачных
+картинок, PNG для картинок с прозрачностью. Анимация сохраняется,
+поэтому многокадровые файлы остаются как есть. Размеры и объём
+итогового файла записываются в пост, а sorl строит миниатюры уже из
+уменьшенной копии.
+"""
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from core.cache import bump_generation
+
+from .models import Post
+
+
+def _has_alpha(image):
+    return image.mode in ('RGBA', 'LA') or (
+        image.mode == 'P' and 'transparency' in image.info
+    )
+
+
+def _encode(image):
+    """Байты и расширение пересжатой картинки."""
+    buffer = BytesIO()
+    icc_profile = image.info.get('icc_profile')
+    if _has_alpha(image):
+        image.convert('RGBA').save(
+            buffer, 'PNG', optimize=True, icc_profile=icc_profile)
+        return buffer.getvalue(), 'png'
+    image.convert('RGB').save(
+        buffer, 'JPEG', quality=settings.POST_IMAGE_QUALITY,
+        optimize=True, progressive=True, icc_profile=icc_profile,
+    )
+    return buffer.getvalue(), 'jpg'
+
+
+def process_image(upload):
+    """Файл для сохранения в пост и его ширина, высота, объём в байтах.
+
+    Если пересжатие не уменьшило файл, а уменьшать и очищать нечего,
+    остаётся исходный файл.
+    """
+    upload.seek(0)
+    original = upload.read()
+    image = Image.open(BytesIO(original))
+    if getattr(image, 'n_frames', 1) > 1:
+        return upload, image.width, image.height, len(original)
+    has_exif = bool(image.getexif())
+    image = ImageOps.exif_transpose(image)
+    resized = image.width > settings.POST_IMAGE_MAX_SIZE[0] or (
+        image.height > settings.POST_IMAGE_MAX_SIZE[1]
+    )
+    image.thumbnail(settings.POST_IMAGE_MAX_SIZE, Image.LANCZOS)
+    content, extension = _encode(image)
+    if len(content) >= len(original) and not (resized or has_exif):
+        upload.seek(0)
+        return upload, image.width, image.height, len(original)
+    name = os.path.splitext(os.path.basename(upload.name))[0]
+    processed = ContentFile(content, name=f'{name}.{extension}')
+    return processed, image.width, image.height, len(content)
+
+
+def process_stored_image(post, delete_original=False):
+    """Обработать уже сохранённую картинку поста, как при загрузке.
+
+    Возвращает True, если файл картинки заменён; тогда миниатюры
+    сбрасываются и их нужно построить заново.
+    """
+    original = post.image.name
+    with post.image.open('rb') as stored:
+        processed, width, height, size = process_image(stored)
+        replaced = processed is not stored
+    if replaced:
+        post.image.save(processed.name, processed, save=False)
+    fields = {'image_width': width, 'image_height': height, 'image_size': size}
+    if replaced:
+        fields.update(
+            image=post.image.name, thumbnails='', updated=timezone.now()
+        )
+    # update() не вызывает сигналов, поэтому поколение меняется здесь.
+    Post.objects.filter(pk=post.pk).update(**fields)
+    if replaced:
+        bump_generation('posts')
+        if delete_original:
+            post.image.storage.delete(original)
+    return replaced
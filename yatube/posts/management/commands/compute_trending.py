@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.trending import compute_trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рейтинг популярных постов. Запускается по '
+        'расписанию или с --interval как постоянный процесс.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--size', type=int, default=None,
+            help='Сколько постов хранить; по умолчанию TRENDING_SIZE.',
+        )
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help='Пересчитывать каждые столько секунд, не завершаясь.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            count = compute_trending(size=options['size'])
+            self.stdout.write(
+                f'Постов в рейтинге: {count}, '
+                f'{time.monotonic() - started:.2f} с'
+            )
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
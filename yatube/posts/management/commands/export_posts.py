@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.transfer import TYPES, detect_format, export_records, write_records
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты, комментарии и подписки в JSON Lines или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', help='Файл для выгрузки; по умолчанию stdout.'
+        )
+        parser.add_argument('--format', choices=('jsonl', 'csv'))
+        parser.add_argument(
+            '--type', dest='types', action='append', choices=TYPES,
+            help='Что выгружать; можно указать несколько раз.',
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        path = options['output']
+        file_format = detect_format(path, options['format'])
+        records = export_records(
+            options['types'] or TYPES, options['chunk_size']
+        )
+        started = time.monotonic()
+        if path:
+            with open(path, 'w', newline='', encoding='utf-8') as stream:
+                written = write_records(records, stream, file_format)
+        else:
+            written = write_records(records, self.stdout, file_format)
+        elapsed = time.monotonic() - started
+        self.stderr.write(
+            f'Выгружено записей: {written} за {elapsed:.1f} с '
+            f'({written / max(elapsed, 1e-6):.0f} в секунду)'
+        )
@@ -0,0 +1,59 @@
+import sys
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.cache import bump_generation
+from posts.transfer import (
+    Importer, detect_format, import_records, read_records,
+)
+
+REBUILD_COMMANDS = ('recount', 'backfill_feed', 'rebuild_search_index')
+
+
+class Command(BaseCommand):
+    help = 'Загружает посты, комментарии и подписки из JSON Lines или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл или - для stdin.')
+        parser.add_argument('--format', choices=('jsonl', 'csv'))
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--media-root',
+            help='MEDIA_ROOT исходной базы: картинки копируются оттуда.',
+        )
+        parser.add_argument(
+            '--no-rebuild', action='store_true',
+            help='Не пересчитывать счётчики, ленты и поисковый индекс.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = detect_format(path, options['format'])
+        importer = Importer(options['batch_size'], options['media_root'])
+        with transaction.atomic():
+            if path == '-':
+                elapsed = import_records(
+                    read_records(sys.stdin, file_format), importer)
+            else:
+                with open(path, newline='', encoding='utf-8') as stream:
+                    elapsed = import_records(
+                        read_records(stream, file_format), importer)
+        total = sum(importer.stats.values())
+        self.stdout.write(
+            'Загружено: ' + ', '.join(
+                f'{kind} {count}' for kind, count in importer.stats.items()
+            ) + f' за {elapsed:.1f} с ({total / max(elapsed, 1e-6):.0f} '
+            'записей в секунду)'
+        )
+        self.stdout.write(
+            f'Новых пользователей: {importer.created_users}, '
+            f'картинок скопировано: {importer.copied_images}, '
+            f'записей с неизвестной группой: {importer.missing_groups}'
+        )
+        # bulk_create не вызывает сигналов.
+        if not options['no_rebuild']:
+            for command in REBUILD_COMMANDS:
+                call_command(command, stdout=self.stdout)
+        bump_generation('posts')
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from posts.images import process_stored_image
+from posts.models import Post
+from posts.thumbnails import generate_thumbnails
+
+
+class Command(BaseCommand):
+    help = (
+        'Уменьшает и пересжимает картинки постов, загруженные до '
+        'обработки при загрузке, и записывает их размеры.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--delete-originals', action='store_true',
+            help='Удалить исходные файлы заменённых картинок.',
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').exclude(
+            image__isnull=True).filter(image_size__isnull=True)
+        checked = replaced = 0
+        for post in posts.only('pk', 'image').iterator():
+            checked += 1
+            if process_stored_image(post, options['delete_originals']):
+                generate_thumbnails(post.pk)
+                replaced += 1
+        self.stdout.write(
+            f'Картинок проверено: {checked}, заменено: {replaced}'
+        )
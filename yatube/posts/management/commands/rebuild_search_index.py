@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from posts.models import Comment, Post, SearchEntry
+from posts.search import FTS_TABLE, get_backend, index_comment, index_post
+
+
+class Command(BaseCommand):
+    help = 'Заново строит поисковый индекс постов и комментариев.'
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        with transaction.atomic():
+            SearchEntry.objects.all().delete()
+            if FTS_TABLE in connection.introspection.table_names():
+                with connection.cursor() as cursor:
+                    cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            posts = 0
+            for post in Post.objects.only('pk', 'text').iterator():
+                index_post(post)
+                posts += 1
+            comments = 0
+            for comment in Comment.objects.only(
+                'pk', 'post_id', 'text'
+            ).iterator():
+                index_comment(comment)
+                comments += 1
+        self.stdout.write(
+            f'Индекс {backend}: постов {posts}, комментариев {comments}'
+        )
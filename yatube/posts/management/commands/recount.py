@@ -0,0 +1,24 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from posts.counters import recount_post, recount_user
+from posts.models import Post
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики пользователей и комментариев к постам.'
+
+    def handle(self, *args, **options):
+        users = 0
+        for user_id in User.objects.values_list('pk', flat=True).iterator():
+            recount_user(user_id)
+            users += 1
+        posts = 0
+        for post_id in Post.objects.values_list('pk', flat=True).iterator():
+            recount_post(post_id)
+            posts += 1
+        self.stdout.write(
+            f'Пересчитано пользователей: {users}, постов: {posts}'
+        )
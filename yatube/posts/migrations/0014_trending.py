@@ -0,0 +1,55 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:23
+
+import datetime
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def backfill_follow_created(apps, schema_editor):
+    """Старые подписки датируются эпохой, а не временем миграции.
+
+    Иначе все они первые TRENDING_WINDOW_HOURS часов считались бы
+    новыми, и рейтинг поднимал бы авторов с большим числом подписчиков.
+    """
+    Follow = apps.get_model('posts', 'Follow')
+    Follow.objects.update(
+        created=datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingPost',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='posts.Post', verbose_name='Пост')),
+                ('position', models.PositiveIntegerField(unique=True, verbose_name='Место')),
+                ('score', models.FloatField(verbose_name='Оценка')),
+            ],
+            options={
+                'verbose_name': 'Популярный пост',
+                'verbose_name_plural': 'Популярные посты',
+                'ordering': ('position',),
+            },
+        ),
+        migrations.AddField(
+            model_name='follow',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, default=django.utils.timezone.now, verbose_name='Время подписки'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(
+            backfill_follow_created, migrations.RunPython.noop
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['created'], name='comment_created_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 2.2.16 on 2026-10-18 06:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_post_image_info'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='commented',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Последнее изменение комментариев'),
+        ),
+        migrations.AddField(
+            model_name='usercounters',
+            name='changed',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+    ]
@@ -1,3 +1,5 @@
+import json
+
 from django.db import models
 from django.contrib.auth import get_user_model
 
@@ -28,6 +30,12 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты для лент: автор и группа одним запросом со страницей."""
+        return self.select_related('author', 'group')
+
+
 class Post(models.Model):
     text = models.TextField(
         verbose_name='Текст',
@@ -37,6 +45,10 @@ class Post(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации'
     )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения'
+    )
     author = models.ForeignKey(
         User, on_delete=models.CASCADE,
         related_name='posts',
@@ -54,13 +66,52 @@ class Post(models.Model):
         blank=True,
         null=True
     )
+    image_width = models.PositiveIntegerField(
+        'Ширина картинки', blank=True, null=True, editable=False,
+    )
+    image_height = models.PositiveIntegerField(
+        'Высота картинки', blank=True, null=True, editable=False,
+    )
+    image_size = models.PositiveIntegerField(
+        'Размер картинки в байтах', blank=True, null=True, editable=False,
+    )
+    thumbnails = models.TextField(
+        'Миниатюры',
+        blank=True,
+        editable=False,
+        help_text='Адреса готовых миниатюр по именам размеров, JSON',
+    )
+    comment_count = models.PositiveIntegerField(
+        'Число комментариев',
+        default=0,
+        editable=False,
+    )
+    commented = models.DateTimeField(
+        'Последнее изменение комментариев',
+        blank=True,
+        null=True,
+        editable=False,
+    )
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return self.text[:15]
 
+    @property
+    def thumbnail_urls(self):
+        return json.loads(self.thumbnails) if self.thumbnails else {}
+
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Пост'
+        indexes = (
+            models.Index(fields=('pub_date',), name='post_date_idx'),
+            models.Index(
+                fields=('group', 'pub_date'), name='post_group_date_idx'),
+            models.Index(
+                fields=('author', 'pub_date'), name='post_author_date_idx'),
+        )
 
 
 class Comment(models.Model):
@@ -88,6 +139,11 @@ class Comment(models.Model):
         ordering = ('-created',)
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(
+                fields=('post', 'created'), name='comment_post_created_idx'),
+            models.Index(fields=('created',), name='comment_created_idx'),
+        )
 
     def __str__(self):
         return self.text[:15]
@@ -106,9 +162,115 @@ class Follow(models.Model):
         related_name='following',
         verbose_name='Автор',
     )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Время подписки',
+    )
 
     class Meta:
         constraints = (
             constraints.UniqueConstraint(
                 fields=('user', 'author'), name='follow_unique'),
         )
+        indexes = (
+            models.Index(
+                fields=('author', 'user'), name='follow_author_user_idx'),
+        )
+
+
+class FeedEntry(models.Model):
+    """Запись ленты подписок, разложенная подписчику при публикации."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Подписчик',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Пост',
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации',
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = (
+            constraints.UniqueConstraint(
+                fields=('user', 'post'), name='feed_entry_unique'),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', 'pub_date', 'post'),
+                name='feed_user_date_post_idx'),
+        )
+
+
+class UserCounters(models.Model):
+    """Счётчики пользователя, которые обновляются сигналами."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='counters',
+        verbose_name='Пользователь',
+    )
+    post_count = models.PositiveIntegerField('Постов', default=0)
+    comment_count = models.PositiveIntegerField('Комментариев', default=0)
+    follower_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+    changed = models.DateTimeField('Дата изменения', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+
+class SearchEntry(models.Model):
+    """Термин поискового индекса: основа слова из поста или комментария."""
+    term = models.CharField('Основа слова', max_length=64)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='search_entries',
+        verbose_name='Пост',
+    )
+    comment = models.ForeignKey(
+        Comment,
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='search_entries',
+        verbose_name='Комментарий',
+    )
+    weight = models.PositiveIntegerField('Вес', default=1)
+
+    class Meta:
+        verbose_name = 'Термин поиска'
+        verbose_name_plural = 'Термины поиска'
+        indexes = (
+            models.Index(fields=('term', 'post'), name='search_term_post_idx'),
+        )
+
+
+class TrendingPost(models.Model):
+    """Место поста в рейтинге популярных; пересчитывается командой."""
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+        verbose_name='Пост',
+    )
+    position = models.PositiveIntegerField('Место', unique=True)
+    score = models.FloatField('Оценка')
+
+    class Meta:
+        ordering = ('position',)
+        verbose_name = 'Популярный пост'
+        verbose_name_plural = 'Популярные посты'
@@ -0,0 +1,163 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from core.counting import cached_count
+
+
+class CursorPage(Page):
+    """Страница, полученная по курсору, без подсчёта общего числа записей."""
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        super().__init__(object_list, 1, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.cursor_mode = True
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def next_page_number(self):
+        return None
+
+    def previous_page_number(self):
+        return None
+
+    @property
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1], 'next')
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(self.object_list[0], 'prev')
+
+
+class CursorPaginator(Paginator):
+    """Постраничный вывод по ключу (order_field, tiebreak) вместо OFFSET.
+
+    Без курсора работает как обычный Paginator, поэтому старые ссылки
+    вида ?page=N продолжают открываться. С курсором страница выбирается
+    условием WHERE по ключу последней показанной записи, и глубина
+    страницы не влияет на стоимость запроса.
+    """
+
+    def __init__(self, object_list, per_page, order_field='pub_date',
+                 tiebreak_field='pk', approximate_count=None,
+                 count_generations=(), estimate_above=None, **kwargs):
+        self.order_field = order_field
+        self.tiebreak_field = tiebreak_field
+        self.approximate_count = approximate_count
+        self.count_generations = count_generations
+        self.estimate_above = estimate_above
+        self.count_is_exact = True
+        object_list = object_list.order_by(
+            f'-{order_field}', f'-{tiebreak_field}'
+        )
+        super().__init__(object_list, per_page, **kwargs)
+
+    @cached_property
+    def count(self):
+        if self.approximate_count:
+            # Считаем не дальше заданной границы: запрос с LIMIT
+            # не сканирует всю таблицу ради числа страниц.
+            return self.object_list[:self.approximate_count].count()
+        if self.count_generations:
+            # Число из кэша до смены поколений; выше estimate_above —
+            # оценка, которой хватает для номеров страниц.
+            count, self.count_is_exact = cached_count(
+                self.object_list, self.count_generations,
+                self.estimate_above,
+            )
+            return count
+        return super().count
+
+    @property
+    def is_approximate(self):
+        if self.approximate_count:
+            return self.count >= self.approximate_count
+        return self.count is not None and not self.count_is_exact
+
+    def _get_page(self, object_list, number, paginator):
+        # Страница по номеру тоже отдаёт курсор на следующую, чтобы
+        # последовательный переход дальше шёл уже без OFFSET.
+        page = super()._get_page(list(object_list), number, paginator)
+        page.cursor_mode = False
+        page.next_cursor = None
+        if page.has_next() and page.object_list:
+            page.next_cursor = self.encode_cursor(
+                page.object_list[-1], 'next'
+            )
+        return page
+
+    def encode_cursor(self, obj, direction):
+        value = getattr(obj, self.order_field)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        pk = getattr(obj, self.tiebreak_field)
+        payload = json.dumps([direction, value, pk])
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            payload = base64.urlsafe_b64decode(cursor.encode())
+            direction, value, pk = json.loads(payload.decode())
+            if isinstance(value, str):
+                value = parse_datetime(value)
+        except (ValueError, TypeError, binascii.Error):
+            return None
+        if direction not in ('next', 'prev'):
+            return None
+        if not isinstance(value, (datetime, int, float)):
+            return None
+        if not isinstance(pk, int):
+            return None
+        return direction, value, pk
+
+    def get_cursor_page(self, cursor):
+        """Вернуть страницу после (или перед) записью из курсора.
+
+        Некорректный курсор открывает первую страницу, как get_page()
+        поступает с некорректным номером.
+        """
+        decoded = self.decode_cursor(cursor) if cursor else None
+        if decoded is None:
+            items = list(self.object_list[:self.per_page + 1])
+            return CursorPage(
+                items[:self.per_page], self,
+                has_next=len(items) > self.per_page,
+                has_previous=False,
+            )
+        direction, value, pk = decoded
+        field, tiebreak = self.order_field, self.tiebreak_field
+        if direction == 'next':
+            queryset = self.object_list.filter(
+                Q(**{f'{field}__lt': value})
+                | Q(**{field: value, f'{tiebreak}__lt': pk})
+            )
+        else:
+            queryset = self.object_list.filter(
+                Q(**{f'{field}__gt': value})
+                | Q(**{field: value, f'{tiebreak}__gt': pk})
+            ).reverse()
+        items = list(queryset[:self.per_page + 1])
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if direction == 'next':
+            return CursorPage(
+                items, self, has_next=has_more, has_previous=True
+            )
+        items.reverse()
+        return CursorPage(items, self, has_next=True, has_previous=has_more)
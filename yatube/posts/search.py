@@ -0,0 +1,196 @@
+"""Полнотекстовый поиск по постам и комментариям.
+
+Текст разбивается на слова и сводится к основам стеммером, после чего
+попадает в один из индексов:
+
+* fts5 — виртуальная таблица SQLite posts_search_fts, ранжирование bm25;
+* tokens — таблица SearchEntry (основа, пост, комментарий, вес),
+  работает на любой базе.
+
+При POST_SEARCH_BACKEND = 'auto' выбирается fts5, если миграция смогла
+создать таблицу. Индекс обновляется сигналами при сохранении и
+удалении постов и комментариев; после смены бэкенда его нужно
+пересобрать командой rebuild_search_index.
+"""
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import (
+    Count, ExpressionWrapper, F, FloatField, IntegerField, Sum, Value,
+)
+from django.db.models.expressions import Col
+from django.db.models.sql.constants import INNER
+
+from .models import Post, SearchEntry
+from .stemmer import stem
+
+FTS_TABLE = 'posts_search_fts'
+
+POST_WEIGHT = 3
+COMMENT_WEIGHT = 1
+
+WORD = re.compile(r'\w+')
+
+
+def terms(text):
+    """Основы слов текста; однобуквенные слова не индексируются."""
+    return [
+        stem(word)[:64] for word in WORD.findall(text.lower())
+        if len(word) > 1
+    ]
+
+
+_detected_backend = None
+
+
+def get_backend():
+    global _detected_backend
+    backend = settings.POST_SEARCH_BACKEND
+    if backend != 'auto':
+        return backend
+    if _detected_backend is None:
+        tables = connection.introspection.table_names()
+        _detected_backend = 'fts5' if FTS_TABLE in tables else 'tokens'
+    return _detected_backend
+
+
+def _fts_rowid(post_id=None, comment_id=None):
+    """rowid строки FTS: чётный для текста поста, нечётный для комментария.
+
+    Удаление по rowid идёт по первичному ключу таблицы, а не перебором.
+    """
+    if comment_id is not None:
+        return comment_id * 2 + 1
+    return post_id * 2
+
+
+def _fts_replace(rowid, text, post_id):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [rowid])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, body, post_id) '
+            'VALUES (%s, %s, %s)',
+            [rowid, ' '.join(terms(text)), post_id],
+        )
+
+
+def _fts_delete(rowid):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [rowid])
+
+
+def _token_insert(text, weight, post_id, comment_id=None):
+    SearchEntry.objects.bulk_create(
+        SearchEntry(
+            term=term, post_id=post_id, comment_id=comment_id,
+            weight=count * weight,
+        )
+        for term, count in Counter(terms(text)).items()
+    )
+
+
+def index_post(post):
+    if get_backend() == 'fts5':
+        _fts_replace(_fts_rowid(post_id=post.pk), post.text, post.pk)
+        return
+    SearchEntry.objects.filter(post=post, comment__isnull=True).delete()
+    _token_insert(post.text, POST_WEIGHT, post.pk)
+
+
+def index_comment(comment):
+    if get_backend() == 'fts5':
+        _fts_replace(
+            _fts_rowid(comment_id=comment.pk), comment.text, comment.post_id
+        )
+        return
+    SearchEntry.objects.filter(comment=comment).delete()
+    _token_insert(comment.text, COMMENT_WEIGHT, comment.post_id, comment.pk)
+
+
+# Строки SearchEntry удаляются каскадом вместе с постом и комментарием,
+# строки FTS5 — по rowid. Комментарии удаляемого поста приходят
+# в сигналах отдельно.
+def unindex_post(post_id):
+    if get_backend() == 'fts5':
+        _fts_delete(_fts_rowid(post_id=post_id))
+
+
+def unindex_comment(comment_id):
+    if get_backend() == 'fts5':
+        _fts_delete(_fts_rowid(comment_id=comment_id))
+
+
+RANK_FIELD = FloatField()
+RANK_FIELD.set_attributes_from_name('score')
+
+
+class RankJoin:
+    """Соединение постов с оценками FTS5, сгруппированными по посту.
+
+    MATCH выполняется один раз в подзапросе, а не для каждой строки
+    результата: колонка post_id в таблице FTS не индексирована.
+    Django 2.2 не умеет соединять с подзапросом, поэтому объект
+    подставляется в alias_map запроса вместо обычного Join.
+    """
+    table_name = 'search_rank'
+    join_type = INNER
+    nullable = False
+    filtered_relation = None
+
+    def __init__(self, parent_alias, match):
+        self.parent_alias = parent_alias
+        self.table_alias = None
+        self.match = match
+
+    def as_sql(self, compiler, connection):
+        qn = compiler.quote_name_unless_alias
+        alias = qn(self.table_alias)
+        return (
+            f'INNER JOIN (SELECT post_id, -SUM(rank) AS score '
+            f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+            f'GROUP BY post_id) {alias} '
+            f'ON {alias}.post_id = {qn(self.parent_alias)}."id"',
+            [self.match],
+        )
+
+    def relabeled_clone(self, change_map):
+        clone = RankJoin(
+            change_map.get(self.parent_alias, self.parent_alias), self.match
+        )
+        clone.table_alias = change_map.get(self.table_alias, self.table_alias)
+        return clone
+
+    def promote(self):
+        return self
+
+    def demote(self):
+        return self
+
+
+def search_posts(query):
+    """Посты, где встречается хотя бы одно слово запроса, с полем rank.
+
+    Чем больше rank, тем выше пост в выдаче. Без слов в запросе
+    возвращается пустой QuerySet.
+    """
+    query_terms = sorted(set(terms(query)))
+    if not query_terms:
+        return Post.objects.none().annotate(rank=Value(0, IntegerField()))
+    if get_backend() == 'fts5':
+        match = ' OR '.join(f'"{term}"' for term in query_terms)
+        posts = Post.objects.all()
+        alias = posts.query.join(
+            RankJoin(posts.query.get_initial_alias(), match)
+        )
+        return posts.annotate(rank=Col(alias, RANK_FIELD))
+    # Сначала посты, где нашлось больше разных слов запроса.
+    return Post.objects.filter(
+        search_entries__term__in=query_terms
+    ).annotate(
+        matched=Count('search_entries__term', distinct=True),
+        weight=Sum('search_entries__weight'),
+    ).annotate(rank=ExpressionWrapper(
+        F('matched') * 1000 + F('weight'), output_field=IntegerField(),
+    ))
@@ -0,0 +1,39 @@
+"""Представление постов в JSON API.
+
+Поля перечислены явно, чтобы в ответ не попадали служебные поля
+модели и чтобы формат не менялся вместе с ней.
+"""
+
+
+def serialize_author(user):
+    return {
+        'username': user.username,
+        'name': user.get_full_name(),
+    }
+
+
+def serialize_group(group):
+    if group is None:
+        return None
+    return {'slug': group.slug, 'title': group.title}
+
+
+def serialize_post(post):
+    return {
+        'id': post.pk,
+        'text': post.text,
+        'pub_date': post.pub_date.isoformat(),
+        'author': serialize_author(post.author),
+        'group': serialize_group(post.group),
+        'image': post.image.url if post.image else None,
+        'thumbnails': post.thumbnail_urls,
+        'comment_count': post.comment_count,
+    }
+
+
+def serialize_page(page):
+    return {
+        'results': [serialize_post(post) for post in page],
+        'next_cursor': page.next_cursor,
+        'previous_cursor': page.previous_cursor,
+    }
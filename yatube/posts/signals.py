@@ -0,0 +1,107 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.cache import bump_generation
+from core.tasks import enqueue
+
+from . import counters, search
+from .models import Comment, Follow, Group, Post, User
+
+# Поля пользователя, которые не показываются в лентах.
+USER_FIELDS_NOT_IN_FEEDS = {'last_login', 'password'}
+
+
+@receiver(post_save, sender=Post)
+def handle_new_post(sender, instance, created, **kwargs):
+    if created:
+        enqueue(
+            'posts.fan_out_post', instance.pk, key=f'fan_out:{instance.pk}'
+        )
+        counters.change_user_counter(instance.author_id, 'post_count', 1)
+
+
+@receiver(post_delete, sender=Post)
+def handle_deleted_post(sender, instance, **kwargs):
+    counters.change_user_counter(instance.author_id, 'post_count', -1)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_feed_pages(sender, **kwargs):
+    bump_generation('posts')
+
+
+@receiver(post_save, sender=User)
+def invalidate_feed_pages_on_rename(sender, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= USER_FIELDS_NOT_IN_FEEDS:
+        return
+    bump_generation('posts')
+
+
+@receiver(post_save, sender=Comment)
+def handle_new_comment(sender, instance, created, **kwargs):
+    if created:
+        counters.change_user_counter(instance.author_id, 'comment_count', 1)
+        counters.change_post_comment_count(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def handle_deleted_comment(sender, instance, **kwargs):
+    counters.change_user_counter(instance.author_id, 'comment_count', -1)
+    counters.change_post_comment_count(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    enqueue('posts.index_post', instance.pk, key=f'index_post:{instance.pk}')
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.unindex_post(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, **kwargs):
+    enqueue(
+        'posts.index_comment', instance.pk,
+        key=f'index_comment:{instance.pk}',
+    )
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_comment(sender, instance, **kwargs):
+    search.unindex_comment(instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_counts(sender, **kwargs):
+    # Число записей в лентах подписок кэшируется по этому поколению.
+    bump_generation('follows')
+
+
+def sync_followed_author(follow):
+    user_id, author_id = follow.user_id, follow.author_id
+    enqueue(
+        'posts.sync_followed_author', user_id, author_id,
+        key=f'follow:{user_id}:{author_id}',
+    )
+
+
+@receiver(post_save, sender=Follow)
+def handle_new_follow(sender, instance, created, **kwargs):
+    if created:
+        sync_followed_author(instance)
+        counters.change_user_counter(instance.user_id, 'following_count', 1)
+        counters.change_user_counter(
+            instance.author_id, 'follower_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def handle_deleted_follow(sender, instance, **kwargs):
+    sync_followed_author(instance)
+    counters.change_user_counter(instance.user_id, 'following_count', -1)
+    counters.change_user_counter(instance.author_id, 'follower_count', -1)
@@ -0,0 +1,140 @@
+"""Стеммер русского языка по алгоритму Snowball.
+
+Слово сводится к основе, чтобы «котами», «коты» и «кот» попадали в
+один термин поискового индекса. Слова не на кириллице возвращаются
+без изменений.
+"""
+import re
+from functools import lru_cache
+
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = (
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+ADJECTIVE = (
+    (),
+    ('ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+     'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+     'ая', 'яя', 'ою', 'ею'),
+)
+PARTICIPLE = (
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+REFLEXIVE = ((), ('ся', 'сь'))
+VERB = (
+    ('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет',
+     'ют', 'ны', 'ть', 'ешь', 'нно'),
+    ('ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй',
+     'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует', 'уют',
+     'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю'),
+)
+NOUN = (
+    (),
+    ('а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+     'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+     'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+     'ья', 'я'),
+)
+DERIVATIONAL = ((), ('ост', 'ость'))
+
+CYRILLIC = re.compile('^[а-я]+$')
+
+
+def _regions(word):
+    """Начала областей RV и R2 по правилам Snowball."""
+    rv = r1 = r2 = len(word)
+    for i, char in enumerate(word):
+        if char in VOWELS:
+            rv = i + 1
+            break
+    for i in range(1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            r1 = i + 1
+            break
+    for i in range(r1 + 1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            r2 = i + 1
+            break
+    return rv, r2
+
+
+@lru_cache(maxsize=None)
+def _candidates(groups):
+    """Окончания группы от длинных к коротким."""
+    preceded, plain = groups
+    candidates = [(ending, True) for ending in preceded]
+    candidates += [(ending, False) for ending in plain]
+    candidates.sort(key=lambda item: len(item[0]), reverse=True)
+    return candidates
+
+
+def _remove(word, start, groups):
+    """Отрезать самое длинное окончание из groups, лежащее после start.
+
+    Окончания первой группы отрезаются, только если перед ними стоит
+    «а» или «я», которые остаются в основе.
+    """
+    for ending, needs_a in _candidates(groups):
+        if not word.endswith(ending):
+            continue
+        cut = len(word) - len(ending)
+        if cut < start:
+            return None
+        if needs_a and (cut - 1 < start or word[cut - 1] not in 'ая'):
+            return None
+        return word[:cut]
+    return None
+
+
+def _remove_adjectival(word, rv):
+    stem = _remove(word, rv, ADJECTIVE)
+    if stem is None:
+        return None
+    return _remove(stem, rv, PARTICIPLE) or stem
+
+
+def _remove_ending(word, rv):
+    """Шаг 1: деепричастие или возвратная частица и окончание."""
+    result = _remove(word, rv, PERFECTIVE_GERUND)
+    if result is not None:
+        return result
+    word = _remove(word, rv, REFLEXIVE) or word
+    for remover in (
+        _remove_adjectival,
+        lambda w, s: _remove(w, s, VERB),
+        lambda w, s: _remove(w, s, NOUN),
+    ):
+        result = remover(word, rv)
+        if result is not None:
+            return result
+    return word
+
+
+def _tidy(word, rv):
+    """Шаг 4: превосходная степень, двойное «н» и мягкий знак."""
+    if word.endswith('ейше') and len(word) - 4 >= rv:
+        word = word[:-4]
+    elif word.endswith('ейш') and len(word) - 3 >= rv:
+        word = word[:-3]
+    elif word.endswith('ь') and len(word) - 1 >= rv:
+        return word[:-1]
+    if word.endswith('нн') and len(word) - 2 >= rv:
+        word = word[:-1]
+    return word
+
+
+# Словарь текстов невелик, поэтому основы выгодно запоминать.
+@lru_cache(maxsize=65536)
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    if not CYRILLIC.match(word):
+        return word
+    rv, r2 = _regions(word)
+    word = _remove_ending(word, rv)
+    if word.endswith('и') and len(word) - 1 >= rv:
+        word = word[:-1]
+    word = _remove(word, r2, DERIVATIONAL) or word
+    return _tidy(word, rv)
@@ -0,0 +1,219 @@
+"""Карта сайта и ленты RSS/Atom, которые отдаются потоком.
+
+Посты читаются через iterator() в порядке ключа, а XML пишется
+частями по SYNDICATION_CHUNK_SIZE записей, поэтому память не зависит
+от числа постов. Карта сайта делится на файлы по SITEMAP_LIMIT
+адресов: файл n содержит посты с id от n * SITEMAP_LIMIT + 1
+до (n + 1) * SITEMAP_LIMIT, так что его границы известны без OFFSET.
+Готовые части кэшируются до смены поколения 'posts'.
+"""
+from itertools import islice
+from xml.sax.saxutils import escape, quoteattr
+
+from django.conf import settings
+from django.db.models import F, Max
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import rfc2822_date, rfc3339_date
+from django.utils.text import Truncator
+from django.views.decorators.http import require_GET
+
+from core.cache import generational_stream
+
+from .models import Group, Post, User
+
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+ATOM_NS = 'http://www.w3.org/2005/Atom'
+
+CONTENT_TYPES = {
+    'sitemap': 'application/xml; charset=utf-8',
+    'rss': 'application/rss+xml; charset=utf-8',
+    'atom': 'application/atom+xml; charset=utf-8',
+}
+
+
+def _chunks(parts):
+    """Склеить строки в части по SYNDICATION_CHUNK_SIZE штук."""
+    parts = iter(parts)
+    while True:
+        chunk = ''.join(islice(parts, settings.SYNDICATION_CHUNK_SIZE))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _stream(request, kind, key, make_parts):
+    key = f'{kind}:{request.get_host()}:{key}'
+    chunks = generational_stream(
+        'posts', key, lambda: _chunks(make_parts())
+    )
+    return StreamingHttpResponse(chunks, content_type=CONTENT_TYPES[kind])
+
+
+def _url(request, name, *args):
+    return request.build_absolute_uri(reverse(name, args=args))
+
+
+def _sitemap_url(loc, lastmod=None):
+    lastmod = f'<lastmod>{rfc3339_date(lastmod)}</lastmod>' if lastmod else ''
+    return f'<url><loc>{escape(loc)}</loc>{lastmod}</url>\n'
+
+
+def _sitemap_index(request):
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield f'<sitemapindex xmlns="{SITEMAP_NS}">\n'
+    yield (
+        f'<sitemap><loc>{escape(_url(request, "posts:sitemap_pages"))}'
+        '</loc></sitemap>\n'
+    )
+    sections = Post.objects.annotate(
+        section=(F('pk') - 1) / settings.SITEMAP_LIMIT
+    ).values('section').annotate(lastmod=Max('updated')).order_by('section')
+    for row in sections.iterator():
+        loc = _url(request, 'posts:sitemap_posts', row['section'])
+        yield (
+            f'<sitemap><loc>{escape(loc)}</loc>'
+            f'<lastmod>{rfc3339_date(row["lastmod"])}</lastmod></sitemap>\n'
+        )
+    yield '</sitemapindex>\n'
+
+
+def _sitemap_pages(request):
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield f'<urlset xmlns="{SITEMAP_NS}">\n'
+    yield _sitemap_url(_url(request, 'posts:index'))
+    yield _sitemap_url(_url(request, 'posts:trending'))
+    slugs = Group.objects.order_by('pk').values_list('slug', flat=True)
+    for slug in slugs.iterator():
+        yield _sitemap_url(_url(request, 'posts:group_list', slug))
+    yield '</urlset>\n'
+
+
+def _sitemap_posts(request, section):
+    limit = settings.SITEMAP_LIMIT
+    posts = Post.objects.filter(
+        pk__gt=section * limit, pk__lte=(section + 1) * limit
+    ).order_by('pk').values_list('pk', 'updated')
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield f'<urlset xmlns="{SITEMAP_NS}">\n'
+    for pk, updated in posts.iterator(chunk_size=2000):
+        yield _sitemap_url(_url(request, 'posts:post_detail', pk), updated)
+    yield '</urlset>\n'
+
+
+@require_GET
+def sitemap_index(request):
+    return _stream(request, 'sitemap', 'index', lambda: _sitemap_index(
+        request))
+
+
+@require_GET
+def sitemap_pages(request):
+    return _stream(request, 'sitemap', 'pages', lambda: _sitemap_pages(
+        request))
+
+
+@require_GET
+def sitemap_posts(request, section):
+    limit = settings.SITEMAP_LIMIT
+    if not Post.objects.filter(
+        pk__gt=section * limit, pk__lte=(section + 1) * limit
+    ).exists():
+        raise Http404
+    return _stream(
+        request, 'sitemap', f'posts:{section}',
+        lambda: _sitemap_posts(request, section),
+    )
+
+
+def _author_name(user):
+    return user.get_full_name() or user.username
+
+
+def _title(post):
+    return Truncator(' '.join(post.text.split())).chars(60)
+
+
+def _rss(request, title, link, posts):
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<rss version="2.0"><channel>\n'
+    yield (
+        f'<title>{escape(title)}</title><link>{escape(link)}</link>'
+        f'<description>{escape(title)}</description>\n'
+    )
+    for post in posts.iterator():
+        url = escape(_url(request, 'posts:post_detail', post.pk))
+        yield (
+            f'<item><title>{escape(_title(post))}</title>'
+            f'<link>{url}</link><guid>{url}</guid>'
+            f'<pubDate>{rfc2822_date(post.pub_date)}</pubDate>'
+            f'<description>{escape(post.text)}</description></item>\n'
+        )
+    yield '</channel></rss>\n'
+
+
+def _atom(request, title, link, posts):
+    updated = posts.aggregate(updated=Max('updated'))['updated']
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield f'<feed xmlns="{ATOM_NS}">\n'
+    yield (
+        f'<title>{escape(title)}</title><link href={quoteattr(link)}/>'
+        f'<id>{escape(link)}</id>'
+    )
+    if updated:
+        yield f'<updated>{rfc3339_date(updated)}</updated>'
+    yield '\n'
+    for post in posts.iterator():
+        url = _url(request, 'posts:post_detail', post.pk)
+        yield (
+            f'<entry><title>{escape(_title(post))}</title>'
+            f'<link href={quoteattr(url)}/><id>{escape(url)}</id>'
+            f'<published>{rfc3339_date(post.pub_date)}</published>'
+            f'<updated>{rfc3339_date(post.updated)}</updated>'
+            f'<author><name>{escape(_author_name(post.author))}</name>'
+            '</author>'
+            f'<summary>{escape(post.text)}</summary></entry>\n'
+        )
+    yield '</feed>\n'
+
+
+FEED_WRITERS = {'rss': _rss, 'atom': _atom}
+
+
+def _feed(request, kind, key, title, link, posts):
+    if kind not in FEED_WRITERS:
+        raise Http404
+    # Последние посты по индексу даты публикации.
+    posts = posts.order_by('-pub_date', '-pk')[:settings.FEED_SIZE]
+    return _stream(
+        request, kind, key,
+        lambda: FEED_WRITERS[kind](request, title, link, posts),
+    )
+
+
+@require_GET
+def index_feed(request, kind):
+    return _feed(
+        request, kind, 'index', 'Последние обновления на сайте',
+        _url(request, 'posts:index'), Post.objects.for_feed(),
+    )
+
+
+@require_GET
+def group_feed(request, slug, kind):
+    group = get_object_or_404(Group, slug=slug)
+    return _feed(
+        request, kind, f'group:{slug}', f'Записи группы {group.title}',
+        _url(request, 'posts:group_list', slug), group.posts.for_feed(),
+    )
+
+
+@require_GET
+def profile_feed(request, username, kind):
+    author = get_object_or_404(User, username=username)
+    return _feed(
+        request, kind, f'profile:{username}',
+        f'Все посты пользователя {_author_name(author)}',
+        _url(request, 'posts:profile', username), author.posts.for_feed(),
+    )
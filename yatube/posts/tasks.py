@@ -0,0 +1,54 @@
+"""Фоновые задачи постов: раскладка лент, поиск и миниатюры.
+
+Задачи получают id и перечитывают записи, поэтому запись, удалённая
+до запуска задачи, просто пропускается, а повторный запуск ничего не
+портит.
+"""
+from core.cache import bump_generation
+from core.tasks import task
+
+from . import feed, search, thumbnails
+from .models import Comment, Follow, Post
+
+
+@task('posts.fan_out_post')
+def fan_out_post(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        feed.fan_out_post(post)
+        # Число записей в лентах подписок закэшировано по 'follows'.
+        bump_generation('follows')
+
+
+@task('posts.sync_followed_author')
+def sync_followed_author(user_id, author_id):
+    """Привести ленту user к текущему состоянию подписки на автора."""
+    followed = Follow.objects.filter(
+        user_id=user_id, author_id=author_id).exists()
+    if followed:
+        feed.add_author_to_feed(user_id, author_id)
+    else:
+        feed.remove_author_from_feed(user_id, author_id)
+    if feed.crossed_fanout_limit(author_id, followed):
+        feed.reconcile_author(author_id)
+    bump_generation('follows')
+
+
+@task('posts.index_post')
+def index_post(post_id):
+    post = Post.objects.filter(pk=post_id).only('pk', 'text').first()
+    if post is not None:
+        search.index_post(post)
+
+
+@task('posts.index_comment')
+def index_comment(comment_id):
+    comment = Comment.objects.filter(pk=comment_id).only(
+        'pk', 'text', 'post_id').first()
+    if comment is not None:
+        search.index_comment(comment)
+
+
+@task('posts.generate_thumbnails')
+def generate_thumbnails(post_id):
+    thumbnails.generate_thumbnails(post_id)
@@ -0,0 +1,58 @@
+import hashlib
+
+from django import template
+from django.conf import settings
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from core.cache import CacheNamespace
+from core.context_processors.urls import url_prefixes
+from core.profiling import count_cache
+
+register = template.Library()
+
+cards_cache = CacheNamespace('posts')
+
+
+def card_cache_key(post, template_name):
+    """Ключ карточки меняется вместе с тем, что в ней показано.
+
+    updated сдвигается при правке поста, comment_count — при новом
+    комментарии, имя автора и адрес группы входят в ключ напрямую.
+    Поэтому старую карточку не нужно удалять: её ключ больше не
+    запрашивается, и запись вытесняется из кэша по таймауту.
+    """
+    author = post.author
+    parts = (
+        post.updated.isoformat(),
+        post.comment_count,
+        author.username,
+        author.get_full_name(),
+        post.group.slug if post.group_id else '',
+    )
+    version = hashlib.md5(repr(parts).encode()).hexdigest()
+    return f'card:{template_name}:{post.pk}:{version}'
+
+
+@register.simple_tag
+def post_cards(posts, template_name):
+    """Пары (пост, html карточки); рендерятся только карточки не из кэша."""
+    posts = list(posts)
+    keys = [card_cache_key(post, template_name) for post in posts]
+    cached = cards_cache.get_many(keys)
+    count_cache(hits=len(cached), misses=len(keys) - len(cached))
+    card_template = get_template(template_name)
+    # Карточки рендерятся без запроса, поэтому префиксы адресов
+    # передаются сюда явно.
+    prefixes = url_prefixes()
+    rendered = {}
+    cards = []
+    for post, key in zip(posts, keys):
+        html = cached.get(key)
+        if html is None:
+            html = rendered[key] = card_template.render(
+                dict(prefixes, post=post))
+        cards.append((post, mark_safe(html)))
+    if rendered:
+        cards_cache.set_many(rendered, settings.POST_CARD_CACHE_TIMEOUT)
+    return cards
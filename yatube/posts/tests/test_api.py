@@ -0,0 +1,119 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+from yatube.settings import NUMBER_OF_POSTS
+
+
+User = get_user_model()
+
+
+class ApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='api_author', first_name='Имя', last_name='Фамилия'
+        )
+        cls.reader = User.objects.create_user(username='api_reader')
+        cls.group = Group.objects.create(
+            title='Группа API',
+            slug='api',
+            description='Описание',
+        )
+        for i in range(NUMBER_OF_POSTS + 3):
+            Post.objects.create(
+                text=f'Пост {i}', author=cls.author, group=cls.group
+            )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_feeds_return_serialized_posts(self):
+        urls = (
+            reverse('api:index'),
+            reverse('api:group_posts', args=[self.group.slug]),
+            reverse('api:profile', args=[self.author.username]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                data = self.client.get(url).json()
+                self.assertEqual(len(data['results']), NUMBER_OF_POSTS)
+                post = data['results'][0]
+                self.assertEqual(post['author'], {
+                    'username': 'api_author', 'name': 'Имя Фамилия'
+                })
+                self.assertEqual(post['group']['slug'], self.group.slug)
+                self.assertIsNotNone(data['next_cursor'])
+
+    def test_cursor_pages_cover_feed(self):
+        url = reverse('api:index')
+        data = self.client.get(url).json()
+        seen = [post['id'] for post in data['results']]
+        while data['next_cursor']:
+            data = self.client.get(url, {'cursor': data['next_cursor']}).json()
+            seen.extend(post['id'] for post in data['results'])
+        self.assertEqual(len(set(seen)), Post.objects.count())
+
+    def test_matching_etag_returns_304_with_page_query_only(self):
+        url = reverse('api:index')
+        etag = self.client.get(url)['ETag']
+        self.assertTrue(etag.startswith('W/'))
+        # Валидаторы считаются по строкам страницы, без агрегата ленты.
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_etag_changes_with_feed(self):
+        url = reverse('api:index')
+        etag = self.client.get(url)['ETag']
+        post = Post.objects.latest('pk')
+        post.text = 'Исправлено'
+        post.save()
+        edited = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(edited.status_code, 200)
+        Comment.objects.create(post=post, author=self.reader, text='Текст')
+        commented = self.client.get(
+            url, HTTP_IF_NONE_MATCH=edited['ETag'])
+        self.assertEqual(commented.status_code, 200)
+
+    def test_author_rename_changes_etag(self):
+        url = reverse('api:index')
+        etag = self.client.get(url)['ETag']
+        self.author.first_name = 'Другое'
+        self.author.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()['results'][0]['author']['name'], 'Другое Фамилия'
+        )
+        self.author.first_name = 'Имя'
+        self.author.save()
+
+    def test_post_detail(self):
+        post = Post.objects.latest('pk')
+        url = reverse('api:post_detail', args=[post.pk])
+        response = self.client.get(url)
+        self.assertEqual(response.json()['id'], post.pk)
+        self.assertEqual(
+            self.client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag']).status_code,
+            304,
+        )
+        missing = reverse('api:post_detail', args=[post.pk + 100])
+        self.assertEqual(self.client.get(missing).status_code, 404)
+
+    def test_follow_feed_requires_login(self):
+        url = reverse('api:follow_index')
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.client.force_login(self.reader)
+        response = self.client.get(url)
+        self.assertEqual(len(response.json()['results']), NUMBER_OF_POSTS)
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_unknown_group_is_404(self):
+        url = reverse('api:group_posts', args=['missing'])
+        self.assertEqual(self.client.get(url).status_code, 404)
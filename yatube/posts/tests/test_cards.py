@@ -0,0 +1,62 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Group, Post
+from ..templatetags.post_cards import card_cache_key, cards_cache
+
+
+User = get_user_model()
+
+CARD_TEMPLATE = 'posts/includes/profile_card.html'
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='card_author', first_name='Старое', last_name='Имя'
+        )
+        cls.group = Group.objects.create(
+            title='Группа карточек',
+            slug='cards',
+            description='Описание',
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.post = Post.objects.create(
+            text='Текст карточки', author=self.author, group=self.group
+        )
+        self.url = reverse('posts:profile', args=[self.author.username])
+        cache.clear()
+
+    def cache_key(self):
+        post = Post.objects.for_feed().get(pk=self.post.pk)
+        return card_cache_key(post, CARD_TEMPLATE)
+
+    def test_cached_card_is_not_rendered_again(self):
+        self.client.get(self.url)
+        cards_cache.set(self.cache_key(), 'карточка из кэша')
+        self.assertContains(self.client.get(self.url), 'карточка из кэша')
+
+    def test_post_edit_changes_card(self):
+        self.client.get(self.url)
+        self.post.text = 'Исправленный текст'
+        self.post.save()
+        self.assertContains(self.client.get(self.url), 'Исправленный текст')
+
+    def test_comment_changes_card_key(self):
+        key = self.cache_key()
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Комментарий'
+        )
+        self.assertNotEqual(key, self.cache_key())
+
+    def test_author_name_change_changes_card(self):
+        self.client.get(self.url)
+        self.author.first_name = 'Новое'
+        self.author.save()
+        self.assertContains(self.client.get(self.url), 'Новое Имя')
@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Post
+
+
+User = get_user_model()
+
+PAGE_SIZE = 10
+
+
+@override_settings(COMMENTS_PAGE_SIZE=PAGE_SIZE)
+class CommentPagesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='commenter')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.author, text=f'Комментарий {i}')
+            for i in range(PAGE_SIZE * 2 + 5)
+        )
+        cls.expected = list(
+            cls.post.comments.order_by('-created', '-pk').values_list(
+                'pk', flat=True)
+        )
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_post_detail_renders_first_page(self):
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        comments = response.context['comments']
+        self.assertEqual(
+            [comment.pk for comment in comments],
+            self.expected[:PAGE_SIZE],
+        )
+        self.assertContains(
+            response, reverse('posts:post_comments', args=[self.post.pk])
+        )
+
+    def test_fragments_cover_all_comments_once(self):
+        url = reverse('posts:post_comments', args=[self.post.pk])
+        response = self.client.get(url)
+        seen = [comment.pk for comment in response.context['comments']]
+        while response.context['comments'].has_next():
+            response = self.client.get(
+                url, {'cursor': response.context['comments'].next_cursor}
+            )
+            seen.extend(
+                comment.pk for comment in response.context['comments']
+            )
+        self.assertEqual(seen, self.expected)
+        self.assertNotContains(response, 'data-more-comments')
+        self.assertTemplateNotUsed(response, 'base.html')
+
+    def test_fragment_of_missing_post_is_404(self):
+        response = self.client.get(
+            reverse('posts:post_comments', args=[self.post.pk + 100])
+        )
+        self.assertEqual(response.status_code, 404)
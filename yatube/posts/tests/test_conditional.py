@@ -0,0 +1,133 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Comment, Follow, Group, Post, UserCounters
+
+
+User = get_user_model()
+
+
+class ConditionalPageTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='cond_author')
+        cls.reader = User.objects.create_user(username='cond_reader')
+        cls.group = Group.objects.create(
+            title='Группа',
+            slug='cond',
+            description='Описание',
+        )
+
+    def setUp(self):
+        self.post = Post.objects.create(
+            text='Пост', author=self.author, group=self.group
+        )
+        self.client = Client()
+        self.client.force_login(self.reader)
+        cache.clear()
+
+    def dated_response(self, url):
+        """Ответ, Last-Modified которого на час раньше текущей секунды."""
+        self.client.get(url)
+        hour_ago = timezone.now() - timedelta(hours=1)
+        Post.objects.update(pub_date=hour_ago, updated=hour_ago)
+        UserCounters.objects.update(changed=hour_ago)
+        return self.client.get(url)
+
+    def revisit_since(self, url, response):
+        return self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+
+    def revisit(self, url, response, client=None):
+        return (client or self.client).get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+
+    def test_unchanged_pages_return_304(self):
+        urls = (
+            reverse('posts:post_detail', args=[self.post.pk]),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertIn('Last-Modified', response)
+                self.assertEqual(self.revisit(url, response).status_code, 304)
+                since = self.client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+                )
+                self.assertEqual(since.status_code, 304)
+
+    def test_new_comment_changes_post_detail(self):
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        response = self.client.get(url)
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        )
+        self.assertContains(self.revisit(url, response), 'Комментарий')
+
+    def test_new_comment_changes_post_detail_date(self):
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        response = self.dated_response(url)
+        self.assertEqual(self.revisit_since(url, response).status_code, 304)
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        )
+        self.assertContains(self.revisit_since(url, response), 'Комментарий')
+
+    def test_new_follower_changes_profile_date(self):
+        url = reverse('posts:profile', args=[self.author.username])
+        response = self.dated_response(url)
+        self.assertEqual(self.revisit_since(url, response).status_code, 304)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.revisit_since(url, response).status_code, 200)
+
+    def test_group_change_changes_group_page(self):
+        url = reverse('posts:group_list', args=[self.group.slug])
+        response = self.client.get(url)
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.assertContains(self.revisit(url, response), 'Новое название')
+
+    def test_author_rename_changes_group_page(self):
+        url = reverse('posts:group_list', args=[self.group.slug])
+        response = self.client.get(url)
+        self.author.first_name = 'Новое имя'
+        self.author.save()
+        self.assertContains(self.revisit(url, response), 'Новое имя')
+
+    def test_group_rename_changes_post_detail(self):
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        response = self.client.get(url)
+        self.group.title = 'Другая группа'
+        self.group.save()
+        self.assertEqual(self.revisit(url, response).status_code, 200)
+
+    def test_new_follower_changes_profile(self):
+        url = reverse('posts:profile', args=[self.author.username])
+        response = self.client.get(url)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.revisit(url, response).status_code, 200)
+
+    def test_profile_etag_depends_on_user(self):
+        url = reverse('posts:profile', args=[self.author.username])
+        response = self.client.get(url)
+        self.assertEqual(
+            self.revisit(url, response, Client()).status_code, 200
+        )
+
+    def test_page_number_is_part_of_etag(self):
+        url = reverse('posts:profile', args=[self.author.username])
+        response = self.client.get(url)
+        other_page = self.client.get(
+            url, {'page': 2}, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(other_page.status_code, 200)
@@ -0,0 +1,63 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..counters import get_user_counters
+from ..models import Comment, Follow, Post, UserCounters
+
+
+User = get_user_model()
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='counted_author')
+        cls.reader = User.objects.create_user(username='counted_reader')
+
+    def test_counters_follow_creates_and_deletes(self):
+        post = Post.objects.create(text='Пост', author=self.author)
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='Комментарий'
+        )
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        author = UserCounters.objects.get(user=self.author)
+        reader = UserCounters.objects.get(user=self.reader)
+        post.refresh_from_db()
+        self.assertEqual(author.post_count, 1)
+        self.assertEqual(author.follower_count, 1)
+        self.assertEqual(reader.comment_count, 1)
+        self.assertEqual(reader.following_count, 1)
+        self.assertEqual(post.comment_count, 1)
+
+        comment.delete()
+        follow.delete()
+        post.delete()
+        author.refresh_from_db()
+        reader.refresh_from_db()
+        self.assertEqual(author.post_count, 0)
+        self.assertEqual(author.follower_count, 0)
+        self.assertEqual(reader.comment_count, 0)
+        self.assertEqual(reader.following_count, 0)
+
+    def test_missing_counters_are_recounted(self):
+        Post.objects.create(text='Пост', author=self.author)
+        UserCounters.objects.all().delete()
+        counters = get_user_counters(self.author)
+        self.assertEqual(counters.post_count, 1)
+
+    def test_recount_command_repairs_drift(self):
+        post = Post.objects.create(text='Пост', author=self.author)
+        Comment.objects.create(post=post, author=self.reader, text='Текст')
+        UserCounters.objects.update(post_count=10, comment_count=10)
+        Post.objects.update(comment_count=10)
+        call_command('recount', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(
+            UserCounters.objects.get(user=self.author).post_count, 1)
+        self.assertEqual(
+            UserCounters.objects.get(user=self.reader).comment_count, 1)
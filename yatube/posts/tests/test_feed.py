@@ -0,0 +1,130 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import Task
+
+from ..feed import follow_feed, heavy_authors_followed_by, trim_feeds
+from ..models import FeedEntry, Follow, Post
+
+
+User = get_user_model()
+
+
+class FollowFeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='feed_author')
+        cls.reader = User.objects.create_user(username='feed_reader')
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.assertEqual(list(follow_feed(self.reader)), [post])
+
+    @override_settings(TASKS_EXECUTOR='database')
+    def test_fan_out_waits_for_task_worker(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Пост в очереди', author=self.author)
+        self.assertFalse(FeedEntry.objects.filter(user=self.reader).exists())
+        call_command('run_tasks', stdout=StringIO())
+        self.assertEqual(list(follow_feed(self.reader)), [post])
+
+    @override_settings(TASKS_EXECUTOR='database')
+    def test_post_is_not_saved_without_its_task(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        client = Client()
+        client.force_login(self.author)
+        failing = mock.patch.object(
+            Task.objects, 'create', side_effect=DatabaseError('сбой'))
+        with failing, self.assertRaises(DatabaseError):
+            client.post(reverse('posts:post_create'), {'text': 'Без задачи'})
+        self.assertFalse(Post.objects.filter(text='Без задачи').exists())
+
+    def test_follow_and_unfollow_update_feed(self):
+        post = Post.objects.create(text='Старый пост', author=self.author)
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(list(follow_feed(self.reader)), [post])
+        follow.delete()
+        self.assertFalse(FeedEntry.objects.filter(user=self.reader).exists())
+
+    @override_settings(FOLLOW_FEED_MAX_ENTRIES=3)
+    def test_feed_is_capped(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        posts = [
+            Post.objects.create(text=f'Пост {i}', author=self.author)
+            for i in range(5)
+        ]
+        entries = FeedEntry.objects.filter(user=self.reader)
+        self.assertEqual(entries.count(), 3)
+        self.assertFalse(entries.filter(post=posts[0]).exists())
+
+    @override_settings(FOLLOW_FEED_FANOUT_LIMIT=0)
+    def test_heavy_authors_come_from_counters(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        with CaptureQueriesContext(connection) as queries:
+            heavy = heavy_authors_followed_by(self.reader)
+        self.assertEqual(heavy, [self.author.pk])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('GROUP BY', queries[0]['sql'])
+
+    @override_settings(FOLLOW_FEED_FANOUT_LIMIT=0)
+    def test_heavy_author_is_read_on_demand(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Пост звезды', author=self.author)
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertEqual(list(follow_feed(self.reader)), [post])
+
+    @override_settings(FOLLOW_FEED_MAX_ENTRIES=2)
+    def test_trim_is_one_query_for_all_followers(self):
+        readers = [
+            User.objects.create_user(username=f'trim_reader_{i}')
+            for i in range(3)
+        ]
+        for reader in readers:
+            Follow.objects.create(user=reader, author=self.author)
+        posts = [
+            Post.objects.create(text=f'Пост {i}', author=self.author)
+            for i in range(4)
+        ]
+        with self.assertNumQueries(1):
+            trim_feeds([reader.pk for reader in readers])
+        for reader in readers:
+            self.assertEqual(
+                list(follow_feed(reader)), [posts[3], posts[2]]
+            )
+
+    @override_settings(FOLLOW_FEED_FANOUT_LIMIT=1)
+    def test_entries_follow_author_weight(self):
+        other = User.objects.create_user(username='feed_other')
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Пост', author=self.author)
+        self.assertTrue(FeedEntry.objects.filter(post=post).exists())
+        # Второй подписчик делает автора тяжёлым: записи не нужны.
+        follow = Follow.objects.create(user=other, author=self.author)
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertEqual(list(follow_feed(self.reader)), [post])
+        follow.delete()
+        self.assertEqual(
+            list(FeedEntry.objects.values_list('user', 'post')),
+            [(self.reader.pk, post.pk)],
+        )
+
+    def test_backfill_command_rebuilds_feed(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Пост', author=self.author)
+        FeedEntry.objects.all().delete()
+        call_command('backfill_feed', stdout=StringIO())
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.reader, post=post).exists()
+        )
@@ -0,0 +1,99 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from ..models import Post
+
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+
+def make_image(name, size, mode='RGB', file_format='JPEG', **options):
+    buffer = BytesIO()
+    Image.effect_noise(size, 64).convert(mode).save(
+        buffer, file_format, **options)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+def photo_with_exif(size):
+    exif = Image.Exif()
+    exif[0x010F] = 'Камера'
+    exif[0x0112] = 6
+    return make_image('photo.jpeg', size, exif=exif.tobytes())
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_IMAGE_MAX_SIZE=(200, 200),
+    POST_THUMBNAILS={},
+)
+class ImageIngestTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='image_author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def create(self, image):
+        self.client.post(
+            reverse('posts:post_create'), {'text': 'Пост', 'image': image}
+        )
+        return Post.objects.get(author=self.author)
+
+    def test_photo_is_resized_rotated_and_stripped(self):
+        post = self.create(photo_with_exif((400, 100)))
+        stored = Image.open(post.image.path)
+        # Метка ориентации 6: кадр повёрнут на 90 градусов.
+        self.assertEqual(stored.size, (50, 200))
+        self.assertEqual(
+            (post.image_width, post.image_height), (50, 200))
+        self.assertEqual(post.image_size, post.image.size)
+        self.assertEqual(stored.format, 'JPEG')
+        self.assertFalse(stored.getexif())
+        self.assertTrue(post.image.name.endswith('.jpg'))
+
+    def test_transparent_image_stays_png(self):
+        post = self.create(make_image(
+            'logo.png', (300, 300), 'RGBA', 'PNG'))
+        stored = Image.open(post.image.path)
+        self.assertEqual((stored.format, stored.mode), ('PNG', 'RGBA'))
+        self.assertEqual(stored.size, (200, 200))
+
+    def test_small_clean_image_is_kept(self):
+        upload = make_image('small.png', (2, 1), file_format='PNG')
+        post = self.create(upload)
+        self.assertTrue(post.image.name.endswith('small.png'))
+        self.assertEqual((post.image_width, post.image_height), (2, 1))
+        self.assertEqual(post.image_size, upload.size)
+
+    def test_command_processes_stored_images(self):
+        post = Post.objects.create(
+            text='Старый пост', author=self.author,
+            image=photo_with_exif((400, 400)),
+        )
+        out = StringIO()
+        call_command('process_images', '--delete-originals', stdout=out)
+        self.assertIn('проверено: 1, заменено: 1', out.getvalue())
+        original = post.image
+        post.refresh_from_db()
+        self.assertEqual((post.image_width, post.image_height), (200, 200))
+        self.assertFalse(original.storage.exists(original.name))
+        call_command('process_images', stdout=out)
+        self.assertIn('проверено: 0', out.getvalue())
@@ -0,0 +1,125 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Group, Post
+from ..paginator import CursorPaginator
+from yatube.settings import NUMBER_OF_POSTS
+
+
+User = get_user_model()
+
+
+class CursorPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='cursor_author')
+        cls.group = Group.objects.create(
+            title='Группа курсора',
+            slug='cursor',
+            description='Описание группы',
+        )
+        # bulk_create даёт постам одинаковую дату: порядок держится на pk.
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.author, group=cls.group)
+            for i in range(NUMBER_OF_POSTS * 2 + 3)
+        )
+        cls.expected = list(
+            Post.objects.order_by('-pub_date', '-pk').values_list(
+                'pk', flat=True)
+        )
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+
+    def test_cursor_pages_cover_all_posts_once(self):
+        paginator = CursorPaginator(Post.objects.all(), NUMBER_OF_POSTS)
+        page = paginator.get_cursor_page('')
+        seen = [post.pk for post in page]
+        self.assertFalse(page.has_previous())
+        while page.has_next():
+            page = paginator.get_cursor_page(page.next_cursor)
+            seen.extend(post.pk for post in page)
+        self.assertEqual(seen, self.expected)
+
+    def test_previous_cursor_returns_same_page(self):
+        paginator = CursorPaginator(Post.objects.all(), NUMBER_OF_POSTS)
+        first = paginator.get_cursor_page('')
+        second = paginator.get_cursor_page(first.next_cursor)
+        back = paginator.get_cursor_page(second.previous_cursor)
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+
+    def test_invalid_cursor_opens_first_page(self):
+        paginator = CursorPaginator(Post.objects.all(), NUMBER_OF_POSTS)
+        page = paginator.get_cursor_page('не-курсор')
+        self.assertEqual(
+            [post.pk for post in page], self.expected[:NUMBER_OF_POSTS]
+        )
+
+    def test_page_number_links_keep_working(self):
+        response = self.client.get(
+            reverse('posts:group_list', args=[self.group.slug]) + '?page=2'
+        )
+        page = response.context['page_obj']
+        self.assertEqual(
+            [post.pk for post in page],
+            self.expected[NUMBER_OF_POSTS:NUMBER_OF_POSTS * 2],
+        )
+        response = self.client.get(
+            reverse('posts:group_list', args=[self.group.slug])
+            + f'?cursor={page.next_cursor}'
+        )
+        self.assertEqual(
+            [post.pk for post in response.context['page_obj']],
+            self.expected[NUMBER_OF_POSTS * 2:],
+        )
+
+    @override_settings(PAGINATOR_APPROXIMATE_COUNT=NUMBER_OF_POSTS)
+    def test_approximate_count_is_bounded(self):
+        response = self.client.get(reverse('posts:index'))
+        paginator = response.context['page_obj'].paginator
+        self.assertEqual(paginator.count, NUMBER_OF_POSTS)
+        self.assertTrue(paginator.is_approximate)
+
+    def test_count_is_cached_until_generation_changes(self):
+        total = len(self.expected)
+        with self.assertNumQueries(1):
+            paginator = CursorPaginator(
+                Post.objects.all(), NUMBER_OF_POSTS,
+                count_generations=('posts',),
+            )
+            self.assertEqual(paginator.count, total)
+        with self.assertNumQueries(0):
+            paginator = CursorPaginator(
+                Post.objects.all(), NUMBER_OF_POSTS,
+                count_generations=('posts',),
+            )
+            self.assertEqual(paginator.num_pages, 3)
+        Post.objects.create(text='Ещё пост', author=self.author)
+        paginator = CursorPaginator(
+            Post.objects.all(), NUMBER_OF_POSTS, count_generations=('posts',),
+        )
+        self.assertEqual(paginator.count, total + 1)
+
+    def test_other_querysets_are_counted_separately(self):
+        for queryset, count in (
+            (Post.objects.all(), len(self.expected)),
+            (Post.objects.filter(group__isnull=True), 0),
+        ):
+            paginator = CursorPaginator(
+                queryset, NUMBER_OF_POSTS, count_generations=('posts',),
+            )
+            self.assertEqual(paginator.count, count)
+
+    def test_count_without_estimator_stays_exact(self):
+        # SQLite не даёт оценки планировщика: число считается точно.
+        paginator = CursorPaginator(
+            Post.objects.all(), NUMBER_OF_POSTS,
+            count_generations=('posts',), estimate_above=NUMBER_OF_POSTS,
+        )
+        self.assertEqual(paginator.count, len(self.expected))
+        self.assertFalse(paginator.is_approximate)
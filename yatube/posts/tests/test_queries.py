@@ -0,0 +1,83 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+from ..trending import compute_trending
+from .utils import QueryBudgetMixin
+from yatube.settings import NUMBER_OF_POSTS
+
+
+User = get_user_model()
+
+# Сессия и пользователь авторизованного клиента входят в бюджет, как и
+# агрегат для ETag у страниц с условными ответами.
+QUERY_BUDGETS = {
+    'posts:index': 4,
+    'posts:group_list': 4,
+    'posts:profile': 6,
+    'posts:follow_index': 5,
+    'posts:post_detail': 5,
+    'posts:post_comments': 3,
+    'posts:trending': 3,
+}
+
+
+class QueryBudgetTest(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='budget_reader')
+        cls.author = User.objects.create_user(
+            username='budget_author', first_name='Имя', last_name='Фамилия'
+        )
+        cls.group = Group.objects.create(
+            title='Группа бюджета',
+            slug='budget',
+            description='Описание',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+        cache.clear()
+
+    def urls(self, post):
+        return {
+            'posts:index': reverse('posts:index'),
+            'posts:group_list': reverse(
+                'posts:group_list', args=[self.group.slug]),
+            'posts:profile': reverse(
+                'posts:profile', args=[self.author.username]),
+            'posts:follow_index': reverse('posts:follow_index'),
+            'posts:post_detail': reverse('posts:post_detail', args=[post.pk]),
+            'posts:post_comments': reverse(
+                'posts:post_comments', args=[post.pk]),
+            'posts:trending': reverse('posts:trending'),
+        }
+
+    def test_query_count_does_not_grow_with_page(self):
+        post = Post.objects.create(
+            text='Пост', author=self.author, group=self.group
+        )
+        Comment.objects.create(post=post, author=self.reader, text='Текст')
+        compute_trending()
+        for name, url in self.urls(post).items():
+            with self.subTest(url=name):
+                self.assert_query_budget(
+                    self.client, url, QUERY_BUDGETS[name])
+
+        for i in range(NUMBER_OF_POSTS * 2):
+            author = User.objects.create_user(username=f'budget_{i}')
+            Follow.objects.create(user=self.reader, author=author)
+            Post.objects.create(text='Пост', author=author, group=self.group)
+            Post.objects.create(text='Пост', author=self.author)
+            Comment.objects.create(post=post, author=author, text='Текст')
+        compute_trending()
+        cache.clear()
+        for name, url in self.urls(post).items():
+            with self.subTest(url=name):
+                self.assert_query_budget(
+                    self.client, url, QUERY_BUDGETS[name])
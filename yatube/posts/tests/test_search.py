@@ -0,0 +1,138 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Post
+from ..search import search_posts
+from ..stemmer import stem
+
+
+User = get_user_model()
+
+
+class StemmerTest(SimpleTestCase):
+    def test_word_forms_share_stem(self):
+        for forms in (
+            ('кот', 'коты', 'котами', 'кота'),
+            ('книга', 'книги', 'книгой', 'книгах'),
+            ('красивый', 'красивая', 'красивыми'),
+        ):
+            with self.subTest(forms=forms):
+                self.assertEqual(len({stem(word) for word in forms}), 1)
+
+    def test_non_cyrillic_word_is_kept(self):
+        self.assertEqual(stem('Django'), 'django')
+
+
+class SearchBackendMixin:
+    def setUp(self):
+        self.author = User.objects.create_user(username='search_author')
+        self.cats = Post.objects.create(
+            text='Мои коты любят спать на книгах', author=self.author
+        )
+        self.dogs = Post.objects.create(
+            text='Собака гуляет во дворе', author=self.author
+        )
+        self.both = Post.objects.create(
+            text='Кот и собака дружат', author=self.author
+        )
+
+    def found(self, query):
+        return list(
+            search_posts(query).order_by('-rank', '-pk').values_list(
+                'pk', flat=True)
+        )
+
+    def test_finds_other_word_forms(self):
+        self.assertCountEqual(
+            self.found('котами'), [self.cats.pk, self.both.pk]
+        )
+
+    def test_more_matched_words_rank_higher(self):
+        self.assertEqual(self.found('кот собаки')[0], self.both.pk)
+
+    def test_empty_query_finds_nothing(self):
+        self.assertEqual(self.found('  !'), [])
+
+    def test_edited_post_is_reindexed(self):
+        self.dogs.text = 'Теперь тут про котов'
+        self.dogs.save()
+        self.assertIn(self.dogs.pk, self.found('кот'))
+        self.assertNotIn(self.dogs.pk, self.found('собака'))
+
+    def test_comment_text_finds_post(self):
+        comment = Comment.objects.create(
+            post=self.dogs, author=self.author, text='Отличная фотография'
+        )
+        self.assertEqual(self.found('фотографии'), [self.dogs.pk])
+        comment.delete()
+        self.assertEqual(self.found('фотографии'), [])
+
+    def test_deleted_post_is_not_found(self):
+        self.cats.delete()
+        self.assertEqual(self.found('коты'), [self.both.pk])
+
+    def test_rebuild_keeps_results(self):
+        before = self.found('кот собака')
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.found('кот собака'), before)
+
+
+@override_settings(POST_SEARCH_BACKEND='tokens')
+class TokenSearchTest(SearchBackendMixin, TestCase):
+    pass
+
+
+@override_settings(POST_SEARCH_BACKEND='fts5')
+class FTS5SearchTest(SearchBackendMixin, TestCase):
+    def test_match_runs_once_per_query(self):
+        sql = str(search_posts('кот собака').query)
+        self.assertEqual(sql.count('MATCH'), 1)
+        self.assertIn('GROUP BY post_id', sql)
+
+
+@override_settings(PAGINATOR_DEFAULT_SIZE=2)
+class SearchViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='search_view')
+        for i in range(5):
+            Post.objects.create(text=f'Поиск номер {i}', author=cls.author)
+        Post.objects.create(text='Другой текст', author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+
+    def test_search_page_shows_found_posts(self):
+        response = self.client.get(reverse('posts:search'), {'q': 'поиска'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['page_obj']), 2)
+        self.assertContains(response, 'q=%D0%BF%D0%BE%D0%B8%D1%81%D0%BA')
+
+    def test_cursor_pages_cover_all_results(self):
+        url = reverse('posts:search')
+        page = self.client.get(url, {'q': 'поиск'}).context['page_obj']
+        seen = [post.pk for post in page]
+        while page.has_next():
+            page = self.client.get(
+                url, {'q': 'поиск', 'cursor': page.next_cursor}
+            ).context['page_obj']
+            seen.extend(post.pk for post in page)
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(len(set(seen)), 5)
+
+    def test_empty_query(self):
+        response = self.client.get(reverse('posts:search'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['page_obj']), 0)
+
+
+@override_settings(POST_SEARCH_BACKEND='tokens')
+class TokenSearchViewTest(SearchViewTest):
+    pass
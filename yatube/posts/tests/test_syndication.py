@@ -0,0 +1,88 @@
+from xml.etree import ElementTree
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Group, Post
+
+
+User = get_user_model()
+
+SITEMAP = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+@override_settings(SITEMAP_LIMIT=2, FEED_SIZE=2, SYNDICATION_CHUNK_SIZE=1)
+class SyndicationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='feed_author', first_name='Автор', last_name='Ленты'
+        )
+        cls.group = Group.objects.create(
+            title='Группа & ко', slug='feeds', description='Описание'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.posts = [
+            Post.objects.create(
+                text=f'Пост <{i}>', author=self.author,
+                group=self.group if i else None,
+            )
+            for i in range(3)
+        ]
+
+    def fetch(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return ElementTree.fromstring(b''.join(response.streaming_content))
+
+    def test_sitemap_is_split_by_limit(self):
+        root = self.fetch(reverse('posts:sitemap'))
+        locations = [loc.text for loc in root.iter(f'{SITEMAP}loc')]
+        section = (self.posts[0].pk - 1) // 2
+        self.assertTrue(locations[0].endswith(reverse('posts:sitemap_pages')))
+        self.assertIn(
+            'http://testserver'
+            + reverse('posts:sitemap_posts', args=[section]),
+            locations,
+        )
+        urls = []
+        for location in locations[1:]:
+            part = self.fetch(location.replace('http://testserver', ''))
+            urls += [loc.text for loc in part.iter(f'{SITEMAP}loc')]
+        self.assertEqual(len(urls), 3)
+        self.assertTrue(urls[0].endswith(
+            reverse('posts:post_detail', args=[self.posts[0].pk])))
+        response = self.client.get(
+            reverse('posts:sitemap_posts', args=[section + 10]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_feeds_list_latest_posts(self):
+        rss = self.fetch(reverse('posts:index_feed', args=['rss']))
+        titles = [item.findtext('title') for item in rss.iter('item')]
+        self.assertEqual(titles, ['Пост <2>', 'Пост <1>'])
+        atom = self.fetch(
+            reverse('posts:group_feed', args=[self.group.slug, 'atom']))
+        self.assertEqual(
+            atom.findtext(f'{ATOM}title'), 'Записи группы Группа & ко'
+        )
+        self.assertEqual(len(atom.findall(f'{ATOM}entry')), 2)
+        profile = self.fetch(
+            reverse('posts:profile_feed', args=[self.author.username, 'rss']))
+        self.assertEqual(len(profile.findall('channel/item')), 2)
+        response = self.client.get(reverse('posts:index_feed', args=['json']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_stream_is_cached_until_posts_change(self):
+        url = reverse('posts:index_feed', args=['rss'])
+        self.fetch(url)
+        with self.assertNumQueries(0):
+            self.fetch(url)
+        Post.objects.create(text='Новый пост', author=self.author)
+        rss = self.fetch(url)
+        self.assertEqual(rss.findtext('channel/item/title'), 'Новый пост')
@@ -0,0 +1,69 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from ..models import Post
+from ..thumbnails import generate_thumbnails
+
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='thumb_author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        buffer = BytesIO()
+        Image.new('RGB', (40, 20), 'red').save(buffer, 'PNG')
+        self.post = Post.objects.create(
+            text='Пост с картинкой',
+            author=self.author,
+            image=SimpleUploadedFile('thumb.png', buffer.getvalue()),
+        )
+        cache.clear()
+
+    def test_thumbnails_are_stored_on_post(self):
+        urls = generate_thumbnails(self.post.pk)
+        self.post.refresh_from_db()
+        self.assertEqual(set(urls), set(settings.POST_THUMBNAILS))
+        self.assertEqual(self.post.thumbnail_urls, urls)
+
+    def test_pages_use_stored_thumbnail(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, self.post.image.url)
+        urls = generate_thumbnails(self.post.pk)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, urls['card'])
+
+    def test_created_post_gets_thumbnails_at_once(self):
+        buffer = BytesIO()
+        Image.new('RGB', (40, 20), 'blue').save(buffer, 'PNG')
+        self.client.force_login(self.author)
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'Новая картинка',
+            'image': SimpleUploadedFile('new.png', buffer.getvalue()),
+        })
+        post = Post.objects.get(text='Новая картинка')
+        self.assertEqual(
+            set(post.thumbnail_urls), set(settings.POST_THUMBNAILS)
+        )
@@ -0,0 +1,117 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..models import Comment, Follow, Group, Post
+
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SOURCE_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class TransferTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='transfer_author')
+        cls.reader = User.objects.create_user(username='transfer_reader')
+        cls.group = Group.objects.create(
+            title='Группа выгрузки',
+            slug='transfer',
+            description='Описание',
+        )
+        cls.post = Post.objects.create(
+            text='Пост для выгрузки', author=cls.author, group=cls.group
+        )
+        cls.pub_date = timezone.now() - timedelta(days=30)
+        Post.objects.filter(pk=cls.post.pk).update(pub_date=cls.pub_date)
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий выгрузки'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(SOURCE_MEDIA_ROOT, ignore_errors=True)
+
+    def export(self, *args):
+        output = StringIO()
+        call_command('export_posts', *args, stdout=output, stderr=StringIO())
+        return output.getvalue()
+
+    def import_file(self, content, name='posts.jsonl', *args):
+        path = os.path.join(TEMP_MEDIA_ROOT, name)
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(content)
+        call_command('import_posts', path, *args, stdout=StringIO())
+
+    def test_export_writes_every_type(self):
+        records = [json.loads(line) for line in self.export().splitlines()]
+        self.assertEqual(
+            [record['type'] for record in records],
+            ['post', 'comment', 'follow'],
+        )
+        self.assertEqual(records[1]['post'], self.post.pk)
+
+    def assert_round_trip(self, content, name):
+        self.import_file(content, name)
+        self.assertEqual(Post.objects.count(), 2)
+        copy = Post.objects.exclude(pk=self.post.pk).get()
+        self.assertEqual(copy.text, self.post.text)
+        self.assertEqual(copy.group, self.group)
+        self.assertEqual(copy.pub_date, self.pub_date)
+        self.assertEqual(
+            copy.comments.get().text, 'Комментарий выгрузки'
+        )
+        self.assertEqual(Follow.objects.count(), 1)
+        self.author.counters.refresh_from_db()
+        self.assertEqual(self.author.counters.post_count, 2)
+
+    def test_jsonl_round_trip(self):
+        self.assert_round_trip(self.export(), 'posts.jsonl')
+
+    def test_csv_round_trip(self):
+        self.assert_round_trip(self.export('--format', 'csv'), 'posts.csv')
+
+    def test_unknown_author_is_created(self):
+        record = {
+            'type': 'post', 'id': 1, 'author': 'newcomer', 'text': 'Привет',
+            'date': self.pub_date.isoformat(),
+        }
+        self.import_file(json.dumps(record))
+        self.assertTrue(
+            Post.objects.filter(author__username='newcomer').exists()
+        )
+
+    def test_images_are_copied(self):
+        source = os.path.join(SOURCE_MEDIA_ROOT, 'posts')
+        os.makedirs(source, exist_ok=True)
+        with open(os.path.join(source, 'a.gif'), 'wb') as image:
+            image.write(b'GIF89a')
+        record = {
+            'type': 'post', 'id': 1, 'author': self.author.username,
+            'text': 'С картинкой', 'date': self.pub_date.isoformat(),
+            'image': 'posts/a.gif',
+        }
+        self.import_file(
+            json.dumps(record), 'posts.jsonl',
+            '--media-root', SOURCE_MEDIA_ROOT,
+        )
+        post = Post.objects.get(text='С картинкой')
+        self.assertTrue(
+            os.path.exists(os.path.join(TEMP_MEDIA_ROOT, post.image.name))
+        )
@@ -0,0 +1,87 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Comment, Follow, Post, TrendingPost
+from ..trending import compute_trending, score_posts
+
+
+User = get_user_model()
+
+
+@override_settings(
+    TRENDING_WINDOW_HOURS=48, TRENDING_HALF_LIFE_HOURS=12,
+    TRENDING_FOLLOW_WEIGHT=2,
+)
+class TrendingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='trend_author')
+        cls.reader = User.objects.create_user(username='trend_reader')
+
+    def setUp(self):
+        self.now = timezone.now()
+
+    def comment(self, post, hours_ago):
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='Комментарий'
+        )
+        Comment.objects.filter(pk=comment.pk).update(
+            created=self.now - timedelta(hours=hours_ago)
+        )
+
+    def test_recent_comments_weigh_more(self):
+        fresh = Post.objects.create(text='Свежий', author=self.author)
+        old = Post.objects.create(text='Старый', author=self.author)
+        outside = Post.objects.create(text='Давний', author=self.author)
+        self.comment(fresh, 0)
+        self.comment(old, 12)
+        self.comment(old, 12)
+        self.comment(outside, 49)
+        scores = score_posts(self.now)
+        self.assertAlmostEqual(scores[fresh.pk], 1, places=3)
+        self.assertAlmostEqual(scores[old.pk], 1, places=3)
+        self.assertNotIn(outside.pk, scores)
+
+    def test_new_followers_lift_fresh_posts_of_author(self):
+        post = Post.objects.create(text='Пост', author=self.author)
+        Follow.objects.create(user=self.reader, author=self.author)
+        scores = score_posts(self.now + timedelta(hours=12))
+        self.assertAlmostEqual(scores[post.pk], 1, places=3)
+
+    def test_top_is_stored_in_order(self):
+        posts = [
+            Post.objects.create(text=f'Пост {i}', author=self.author)
+            for i in range(3)
+        ]
+        for count, post in enumerate(posts):
+            for _ in range(count):
+                self.comment(post, 0)
+        self.assertEqual(compute_trending(self.now, size=1), 1)
+        self.assertEqual(
+            list(TrendingPost.objects.values_list('post', 'position')),
+            [(posts[2].pk, 1)],
+        )
+        out = StringIO()
+        call_command('compute_trending', stdout=out)
+        self.assertIn('Постов в рейтинге: 2', out.getvalue())
+
+    def test_page_lists_trending_posts(self):
+        first = Post.objects.create(text='Обсуждаемый', author=self.author)
+        second = Post.objects.create(text='Менее обсуждаемый',
+                                     author=self.author)
+        self.comment(first, 0)
+        self.comment(first, 1)
+        self.comment(second, 0)
+        compute_trending(self.now)
+        response = self.client.get(reverse('posts:trending'))
+        self.assertEqual(list(response.context['posts']), [first, second])
+        first.delete()
+        response = self.client.get(reverse('posts:trending'))
+        self.assertEqual(list(response.context['posts']), [second])
@@ -313,20 +313,28 @@ class CacheTest(TestCase):
 
     def test_cache_index_page(self):
         response = self.authorized_client.get(reverse('posts:index')).content
-        Post.objects.create(
-            author=self.user,
-            text='Тестовый текст'
-        )
+        # update() не отправляет сигналов, поэтому страница остаётся в кэше.
+        Post.objects.filter(pk=self.post.pk).update(text='Без сигналов')
         self.assertEqual(
             response, self.authorized_client.get(
                 reverse('posts:index')).content
         )
-        cache.clear()
+        Post.objects.create(
+            author=self.user,
+            text='Тестовый текст'
+        )
         self.assertNotEqual(
             response, self.authorized_client.get
             (reverse('posts:index')).content
         )
 
+    def test_cache_group_page_invalidated_by_group_change(self):
+        url = reverse('posts:group_list', args=[self.group.slug])
+        self.authorized_client.get(url)
+        self.group.title = 'Новый заголовок'
+        self.group.save()
+        self.assertContains(self.authorized_client.get(url), 'Новый заголовок')
+
 
 class FollowsTests(TestCase):
     @classmethod
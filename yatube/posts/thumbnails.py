@@ -0,0 +1,81 @@
+"""Фоновая подготовка миниатюр картинок постов.
+
+post_create и post_edit ставят пост в очередь задач core.tasks или,
+без неё, в пул из POST_THUMBNAIL_WORKERS потоков после фиксации
+транзакции. Без пула (в тестах) миниатюры строятся сразу, как любая
+задача с TASKS_EXECUTOR = 'local'. Задача строит
+миниатюры всех размеров из POST_THUMBNAILS через sorl и сохраняет
+их адреса в Post.thumbnails, поэтому шаблоны берут готовый адрес и не
+обращаются к Pillow.
+"""
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from sorl.thumbnail import get_thumbnail
+
+from core.cache import bump_generation
+from core.tasks import enqueue, is_durable
+
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.POST_THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails',
+        )
+    return _executor
+
+
+def generate_thumbnails(post_id):
+    post = Post.objects.filter(pk=post_id).only('pk', 'image').first()
+    if post is None or not post.image:
+        return {}
+    urls = {}
+    for name, options in settings.POST_THUMBNAILS.items():
+        options = dict(options)
+        geometry = options.pop('geometry')
+        urls[name] = get_thumbnail(post.image, geometry, **options).url
+    # update() не вызывает сигналов; updated меняет ключ карточки,
+    # а новое поколение сбрасывает закэшированные страницы лент.
+    Post.objects.filter(pk=post_id, image=post.image.name).update(
+        thumbnails=json.dumps(urls), updated=timezone.now()
+    )
+    bump_generation('posts')
+    return urls
+
+
+def _run(post_id):
+    try:
+        generate_thumbnails(post_id)
+    except Exception:
+        logger.exception('Не удалось построить миниатюры поста %s', post_id)
+    finally:
+        connection.close()
+
+
+def enqueue_thumbnails(post):
+    """Поставить миниатюры поста в очередь.
+
+    С очередью в базе задачу выполнит run_tasks, с пулом потоков — пул
+    после фиксации транзакции, иначе миниатюры строятся сразу.
+    """
+    if not post.image:
+        return
+    post_id = post.pk
+    if is_durable() or not settings.POST_THUMBNAIL_WORKERS:
+        enqueue(
+            'posts.generate_thumbnails', post_id, key=f'thumbnails:{post_id}'
+        )
+        return
+    transaction.on_commit(lambda: get_executor().submit(_run, post_id))
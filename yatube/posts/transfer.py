@@ -0,0 +1,216 @@
+"""Потоковые выгрузка и загрузка постов, комментариев и подписок.
+
+Каждая запись — словарь с полями FIELDS, где type один из post,
+comment, follow. Пользователи и группы указываются по username и slug,
+посты и комментарии — по id из исходной базы. Форматы: JSON Lines и
+CSV; оба читаются и пишутся построчно, поэтому память не зависит от
+размера файла.
+
+При загрузке id постов и комментариев сдвигаются на наибольший id в
+базе, так что ссылки комментариев на посты из того же файла
+сохраняются без словаря соответствий. Загрузку нужно запускать, пока
+в базу не пишут другие процессы.
+"""
+import csv
+import json
+import os
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.color import no_style
+from django.db import connection
+from django.db.models import Max
+from django.utils.dateparse import parse_datetime
+
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+FIELDS = (
+    'type', 'id', 'author', 'group', 'text', 'date', 'image', 'post',
+    'user',
+)
+TYPES = ('post', 'comment', 'follow')
+
+
+def export_records(types=TYPES, chunk_size=2000):
+    """Записи для выгрузки; объекты читаются из базы частями."""
+    if 'post' in types:
+        posts = Post.objects.select_related('author', 'group').order_by('pk')
+        for post in posts.iterator(chunk_size=chunk_size):
+            yield {
+                'type': 'post',
+                'id': post.pk,
+                'author': post.author.username,
+                'group': post.group.slug if post.group_id else '',
+                'text': post.text,
+                'date': post.pub_date.isoformat(),
+                'image': post.image.name if post.image else '',
+            }
+    if 'comment' in types:
+        comments = Comment.objects.select_related('author').order_by('pk')
+        for comment in comments.iterator(chunk_size=chunk_size):
+            yield {
+                'type': 'comment',
+                'id': comment.pk,
+                'author': comment.author.username,
+                'text': comment.text,
+                'date': comment.created.isoformat(),
+                'post': comment.post_id,
+            }
+    if 'follow' in types:
+        follows = Follow.objects.select_related('user', 'author').order_by(
+            'pk')
+        for follow in follows.iterator(chunk_size=chunk_size):
+            yield {
+                'type': 'follow',
+                'user': follow.user.username,
+                'author': follow.author.username,
+            }
+
+
+def write_records(records, stream, file_format):
+    written = 0
+    if file_format == 'csv':
+        writer = csv.DictWriter(stream, FIELDS, restval='')
+        writer.writeheader()
+        for record in records:
+            writer.writerow(record)
+            written += 1
+        return written
+    for record in records:
+        stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+        written += 1
+    return written
+
+
+def read_records(stream, file_format):
+    if file_format == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def detect_format(path, file_format=None):
+    if file_format:
+        return file_format
+    return 'csv' if path and path.endswith('.csv') else 'jsonl'
+
+
+class Importer:
+    """Загрузка записей пакетами bulk_create по batch_size штук."""
+
+    def __init__(self, batch_size=1000, media_root=None):
+        self.batch_size = batch_size
+        self.media_root = media_root
+        self.users = dict(User.objects.values_list('username', 'pk'))
+        self.groups = dict(Group.objects.values_list('slug', 'pk'))
+        self.post_offset = Post.objects.aggregate(top=Max('pk'))['top'] or 0
+        self.comment_offset = (
+            Comment.objects.aggregate(top=Max('pk'))['top'] or 0
+        )
+        self.pending = {kind: [] for kind in TYPES}
+        self.stats = {kind: 0 for kind in TYPES}
+        self.created_users = 0
+        self.copied_images = 0
+        self.missing_groups = 0
+
+    def user_id(self, username):
+        if username not in self.users:
+            user = User(username=username)
+            user.set_unusable_password()
+            user.save()
+            self.users[username] = user.pk
+            self.created_users += 1
+        return self.users[username]
+
+    def group_id(self, slug):
+        if slug and slug not in self.groups:
+            self.missing_groups += 1
+        return self.groups.get(slug) if slug else None
+
+    def copy_image(self, name):
+        if not name or not self.media_root:
+            return name or None
+        with open(os.path.join(self.media_root, name), 'rb') as image:
+            saved = default_storage.save(name, File(image))
+        self.copied_images += 1
+        return saved
+
+    def build_post(self, record):
+        return Post(
+            pk=int(record['id']) + self.post_offset,
+            text=record['text'],
+            author_id=self.user_id(record['author']),
+            group_id=self.group_id(record.get('group')),
+            image=self.copy_image(record.get('image')),
+        ), parse_datetime(record['date'])
+
+    def build_comment(self, record):
+        return Comment(
+            pk=int(record['id']) + self.comment_offset,
+            post_id=int(record['post']) + self.post_offset,
+            author_id=self.user_id(record['author']),
+            text=record['text'],
+        ), parse_datetime(record['date'])
+
+    def build_follow(self, record):
+        return Follow(
+            user_id=self.user_id(record['user']),
+            author_id=self.user_id(record['author']),
+        ), None
+
+    def add(self, record):
+        kind = record['type']
+        if kind not in TYPES:
+            raise ValueError(f'Неизвестный тип записи: {kind}')
+        self.pending[kind].append(getattr(self, f'build_{kind}')(record))
+        if len(self.pending[kind]) >= self.batch_size:
+            self.flush(kind)
+
+    def flush(self, kind):
+        pending, self.pending[kind] = self.pending[kind], []
+        if not pending:
+            return
+        objs = [obj for obj, _ in pending]
+        if kind == 'follow':
+            Follow.objects.bulk_create(objs, ignore_conflicts=True)
+        else:
+            self._create_with_dates(kind, pending)
+        self.stats[kind] += len(objs)
+
+    def _create_with_dates(self, kind, pending):
+        # auto_now_add заменяет дату при вставке, поэтому исходная
+        # дата возвращается вторым запросом.
+        model, date_field = (
+            (Post, 'pub_date') if kind == 'post' else (Comment, 'created')
+        )
+        objs = [obj for obj, _ in pending]
+        model.objects.bulk_create(objs)
+        for obj, date in pending:
+            if date is not None:
+                setattr(obj, date_field, date)
+        model.objects.bulk_update(objs, [date_field])
+
+    def finish(self):
+        for kind in TYPES:
+            self.flush(kind)
+        # Явные id не двигают последовательности PostgreSQL.
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [Post, Comment]
+        )
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+
+def import_records(records, importer):
+    started = time.monotonic()
+    for record in records:
+        importer.add(record)
+    importer.finish()
+    return time.monotonic() - started
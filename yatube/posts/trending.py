@@ -0,0 +1,80 @@
+"""Рейтинг популярных постов, который считается заранее.
+
+Оценка поста — сумма вкладов событий за последние
+TRENDING_WINDOW_HOURS часов, и каждый вклад вдвое слабеет за
+TRENDING_HALF_LIFE_HOURS часов:
+
+* комментарий к посту — 1;
+* новая подписка на автора — TRENDING_FOLLOW_WEIGHT каждому его посту,
+  опубликованному в том же окне.
+
+Команда compute_trending читает события окна потоком, оставляет
+TRENDING_SIZE лучших постов и заменяет ими таблицу TrendingPost.
+Страница популярного читает из неё не больше TRENDING_SIZE строк
+одним запросом и не трогает комментарии.
+"""
+import heapq
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Comment, Follow, Post, TrendingPost
+
+
+def decay(created, now):
+    age = (now - created).total_seconds() / 3600
+    return 0.5 ** (age / settings.TRENDING_HALF_LIFE_HOURS)
+
+
+def _follow_scores(since, now):
+    by_author = defaultdict(float)
+    follows = Follow.objects.filter(created__gte=since).values_list(
+        'author_id', 'created')
+    for author_id, created in follows.iterator():
+        by_author[author_id] += decay(created, now)
+    return by_author
+
+
+def score_posts(now=None):
+    """Оценки постов с событиями в окне: словарь id поста -> оценка."""
+    now = now or timezone.now()
+    since = now - timedelta(hours=settings.TRENDING_WINDOW_HOURS)
+    scores = defaultdict(float)
+    comments = Comment.objects.filter(created__gte=since).values_list(
+        'post_id', 'created')
+    for post_id, created in comments.iterator():
+        scores[post_id] += decay(created, now)
+    by_author = _follow_scores(since, now)
+    if by_author:
+        weight = settings.TRENDING_FOLLOW_WEIGHT
+        fresh = Post.objects.filter(
+            pub_date__gte=since, author_id__in=list(by_author),
+        ).values_list('pk', 'author_id')
+        for post_id, author_id in fresh.iterator():
+            scores[post_id] += weight * by_author[author_id]
+    return scores
+
+
+def compute_trending(now=None, size=None):
+    """Пересчитать рейтинг; возвращает число постов в нём."""
+    size = size or settings.TRENDING_SIZE
+    top = heapq.nlargest(
+        size, score_posts(now).items(), key=lambda item: item[1]
+    )
+    with transaction.atomic():
+        TrendingPost.objects.all().delete()
+        TrendingPost.objects.bulk_create(
+            TrendingPost(post_id=post_id, position=position, score=score)
+            for position, (post_id, score) in enumerate(top, start=1)
+        )
+    return len(top)
+
+
+def trending_posts():
+    """Посты рейтинга по порядку, одним запросом."""
+    return Post.objects.for_feed().filter(
+        trending__isnull=False
+    ).order_by('trending__position')
@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import syndication, views
 
 app_name = 'posts'
 
@@ -20,11 +20,40 @@ urlpatterns = [
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
     path(
         'posts/<int:post_id>/comment/',
         views.add_comment,
         name='add_comment'
     ),
+    path('search/', views.search, name='search'),
+    path('trending/', views.trending, name='trending'),
+    path('sitemap.xml', syndication.sitemap_index, name='sitemap'),
+    path(
+        'sitemap-pages.xml',
+        syndication.sitemap_pages,
+        name='sitemap_pages'
+    ),
+    path(
+        'sitemap-posts-<int:section>.xml',
+        syndication.sitemap_posts,
+        name='sitemap_posts'
+    ),
+    path('feed/<str:kind>/', syndication.index_feed, name='index_feed'),
+    path(
+        'group/<slug:slug>/feed/<str:kind>/',
+        syndication.group_feed,
+        name='group_feed'
+    ),
+    path(
+        'profile/<str:username>/feed/<str:kind>/',
+        syndication.profile_feed,
+        name='profile_feed'
+    ),
     path('follow/', views.follow_index, name='follow_index'),
     path(
         'profile/<str:username>/follow/',
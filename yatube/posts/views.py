@@ -1,27 +1,58 @@
 from django.conf import settings
+from django.db.models import Max
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import QueryDict
 from django.shortcuts import get_object_or_404, redirect, render
 
+from core.cache import CacheNamespace, generational_cache_page, get_generation
+
+from .conditional import conditional_page, post_stats
+from .counters import get_user_counters
+from .feed import follow_feed
 from .forms import PostForm, CommentForm
-from .models import Group, Post, User, Follow
-from django.views.decorators.cache import cache_page
+from .models import Comment, Group, Post, User, Follow
+from .paginator import CursorPaginator
+from .search import search_posts
+from .thumbnails import enqueue_thumbnails
+from .trending import trending_posts
 
 
-def paginator_func(request, objects):
-    paginator = Paginator(
-        objects, settings.PAGINATOR_DEFAULT_SIZE
+def paginator_func(request, objects, count_generations=('posts',),
+                   **kwargs):
+    """Страница ленты; число записей кэшируется до смены поколений
+    count_generations."""
+    paginator = CursorPaginator(
+        objects, settings.PAGINATOR_DEFAULT_SIZE,
+        approximate_count=settings.PAGINATOR_APPROXIMATE_COUNT,
+        count_generations=count_generations,
+        estimate_above=settings.COUNT_ESTIMATE_THRESHOLD,
+        **kwargs
     )
+    cursor = request.GET.get('cursor')
+    if cursor is not None:
+        return paginator.get_cursor_page(cursor)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
 
     return page_obj
 
 
-@cache_page(20, key_prefix='index_page')
+def get_group(slug):
+    """Группа по slug из кэша; запись забывается со сменой поколения."""
+    key = f"group:{get_generation('posts')}:{slug}"
+    namespace = CacheNamespace('posts')
+    group = namespace.get(key)
+    if group is None:
+        group = get_object_or_404(Group, slug=slug)
+        namespace.set(key, group)
+    return group
+
+
+@generational_cache_page('posts')
 def index(request):
     template = 'posts/index.html'
-    posts = Post.objects.all()
+    posts = Post.objects.for_feed()
     page_obj = paginator_func(request, posts)
     context = {
         'posts': posts,
@@ -30,9 +61,20 @@ def index(request):
     return render(request, template, context)
 
 
+def group_validators(request, slug):
+    return Post.objects.filter(group__slug=slug).aggregate(
+        title=Max('group__title'),
+        description=Max('group__description'),
+        **post_stats(),
+    )
+
+
+# Шапка страницы группы не показывает пользователя.
+@conditional_page(group_validators, per_user=False)
+@generational_cache_page('posts')
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
+    group = get_group(slug)
+    posts = group.posts.for_feed()
     template_groups = 'posts/group_list.html'
     page_obj = paginator_func(request, posts)
     context = {
@@ -43,30 +85,73 @@ def group_posts(request, slug):
     return render(request, template_groups, context)
 
 
+def profile_validators(request, username):
+    return Post.objects.filter(author__username=username).aggregate(
+        first_name=Max('author__first_name'),
+        last_name=Max('author__last_name'),
+        followers=Max('author__counters__follower_count'),
+        following=Max('author__counters__following_count'),
+        counters_changed=Max('author__counters__changed'),
+        **post_stats(),
+    )
+
+
+@conditional_page(profile_validators)
 def profile(request, username):
     template = 'posts/profile.html'
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    post_count = posts.count()
+    author = get_object_or_404(
+        User.objects.select_related('counters'), username=username
+    )
+    posts = author.posts.for_feed()
+    counters = get_user_counters(author)
     page_obj = paginator_func(request, posts)
     context = {
         'author': author,
         'page_obj': page_obj,
-        'post_count': post_count,
+        'post_count': counters.post_count,
+        'counters': counters,
         'posts': posts,
     }
     return render(request, template, context)
 
 
+def comments_page(request, post_id):
+    """Первая или следующая по курсору страница комментариев поста."""
+    comments = Comment.objects.filter(post_id=post_id).select_related(
+        'author')
+    paginator = CursorPaginator(
+        comments, settings.COMMENTS_PAGE_SIZE, order_field='created'
+    )
+    return paginator.get_cursor_page(request.GET.get('cursor', ''))
+
+
+def post_detail_validators(request, post_id):
+    # Новые и удалённые комментарии меняют comment_count.
+    return Post.objects.filter(pk=post_id).aggregate(
+        group=Max('group__slug'),
+        group_title=Max('group__title'),
+        first_name=Max('author__first_name'),
+        last_name=Max('author__last_name'),
+        posts_count=Max('author__counters__post_count'),
+        counters_changed=Max('author__counters__changed'),
+        **post_stats(),
+    )
+
+
+@conditional_page(post_detail_validators)
 def post_detail(request, post_id):
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, pk=post_id)
-    comments = post.comments.all()
+    post = get_object_or_404(
+        Post.objects.for_feed().select_related('author__counters'),
+        pk=post_id
+    )
+    comments = comments_page(request, post_id)
     author = post.author
-    posts_count = post.author.posts.count()
+    posts_count = get_user_counters(author).post_count
     form = CommentForm(request.POST or None)
     context = {
         'post': post,
+        'post_id': post_id,
         'posts_count': posts_count,
         'comments': comments,
         'author': author,
@@ -75,7 +160,18 @@ def post_detail(request, post_id):
     return render(request, template, context)
 
 
+def post_comments(request, post_id):
+    template = 'includes/comment_list.html'
+    get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    context = {
+        'post_id': post_id,
+        'comments': comments_page(request, post_id),
+    }
+    return render(request, template, context)
+
+
 @login_required
+@transaction.atomic
 def post_create(request):
     template = 'posts/create_post.html'
     form = PostForm(request.POST or None, files=request.FILES or None)
@@ -84,10 +180,12 @@ def post_create(request):
     post = form.save(commit=False)
     post.author = request.user
     post.save()
+    enqueue_thumbnails(post)
     return redirect('posts:profile', username=request.user.username)
 
 
 @login_required
+@transaction.atomic
 def post_edit(request, post_id):
     template = 'posts/create_post.html'
     post = get_object_or_404(Post, pk=post_id)
@@ -104,11 +202,16 @@ def post_edit(request, post_id):
             template,
             {'form': form, 'post': post}
         )
-    form.save()
+    if 'image' in form.changed_data:
+        post.thumbnails = ''
+    post = form.save()
+    if 'image' in form.changed_data:
+        enqueue_thumbnails(post)
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
+@transaction.atomic
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
@@ -120,16 +223,46 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+def search(request):
+    template = 'posts/search.html'
+    query = request.GET.get('q', '').strip()
+    posts = search_posts(query).select_related('author', 'group')
+    # Индекс поиска меняется и с комментариями, поэтому число
+    # результатов не кэшируется.
+    page_obj = paginator_func(
+        request, posts, count_generations=(), order_field='rank'
+    )
+    # Ссылки пагинатора сохраняют запрос.
+    pagination_query = QueryDict(mutable=True)
+    pagination_query['q'] = query
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'pagination_query': pagination_query.urlencode() + '&',
+    }
+    return render(request, template, context)
+
+
+def trending(request):
+    template = 'posts/trending.html'
+    context = {'posts': trending_posts()}
+    return render(request, template, context)
+
+
 @login_required
 def follow_index(request):
     template = 'posts/follow.html'
-    posts = Post.objects.filter(author__following__user=request.user)
-    page_obj = paginator_func(request, posts)
+    posts = follow_feed(request.user)
+    page_obj = paginator_func(
+        request, posts, count_generations=('posts', 'follows'),
+        order_field='feed_date', tiebreak_field='feed_post',
+    )
     context = {'page_obj': page_obj}
     return render(request, template, context)
 
 
 @login_required
+@transaction.atomic
 def profile_follow(request, username):
     template = 'posts/follow.html'
     user = request.user
@@ -143,6 +276,7 @@ def profile_follow(request, username):
 
 
 @login_required
+@transaction.atomic
 def profile_unfollow(request, username):
     template = 'posts/profile.html'
     get_object_or_404(
@@ -1,4 +1,5 @@
 import os
+import sys
 
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -7,6 +8,9 @@ SECRET_KEY = 'rw-7yd0=_xue#tazj=nl+5udzg7ucge#^f94gma^s#@8aszeq1'
 
 DEBUG = False
 
+# Запуск тестов: manage.py test или pytest.
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+
 ALLOWED_HOSTS = [
     '127.0.0.1',
     'localhost',
@@ -31,8 +35,13 @@ INSTALLED_APPS = [
     'sorl.thumbnail',
     'debug_toolbar',
 ]
+# Команды нагрузочных замеров (bench) нужны только при разработке,
+# в тестах и при YATUBE_BENCH=1.
+if DEBUG or os.environ.get('YATUBE_BENCH') or TESTING:
+    INSTALLED_APPS.append('bench.apps.BenchConfig')
 
 MIDDLEWARE = [
+    'core.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -46,11 +55,21 @@ MIDDLEWARE = [
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+# Без DEBUG шаблоны разбираются один раз на процесс; при разработке
+# загрузчики читают файлы заново, чтобы правки были видны сразу.
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if not DEBUG:
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    ]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -58,17 +77,36 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'core.context_processors.urls.url_prefixes',
             ],
+            'loaders': TEMPLATE_LOADERS,
         },
     },
 ]
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
+# Потоки с Django на процесс при запуске через yatube.asgi.
+ASGI_THREADS = int(os.environ.get('ASGI_THREADS', 4))
+
+# Фоновые задачи (core.tasks): 'database' складывает их в таблицу для
+# команды run_tasks, 'local' выполняет сразу в процессе, как в тестах.
+TASKS_EXECUTOR = 'local' if TESTING else os.environ.get(
+    'YATUBE_TASKS', 'database')
+TASKS_BATCH_SIZE = 50
+TASKS_MAX_ATTEMPTS = 5
+# Задержка перед повтором в секундах, удваивается с каждой попыткой.
+TASKS_RETRY_DELAY = 10
+# Через столько секунд задачу упавшего обработчика берёт другой.
+TASKS_LEASE = 300
+# Выполненные и упавшие задачи хранятся столько дней.
+TASKS_KEEP_DAYS = 7
 
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'NAME': os.environ.get(
+            'YATUBE_DB', os.path.join(BASE_DIR, 'db.sqlite3')
+        ),
     }
 }
 
@@ -111,16 +149,120 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 PAGINATOR_DEFAULT_SIZE = 10
+# Если задано число, пагинатор считает записи не дальше этой границы.
+PAGINATOR_APPROXIMATE_COUNT = None
+# Панель страниц: сколько номеров показывать вокруг текущей и по краям.
+PAGINATOR_ON_EACH_SIDE = 2
+PAGINATOR_ON_ENDS = 1
+# Выше этого числа записей лента показывает оценку планировщика
+# вместо точного COUNT (PostgreSQL); None — всегда точно.
+COUNT_ESTIMATE_THRESHOLD = None
 
 NUMBER_OF_POSTS = 10
 
+# Комментарии на странице поста; остальные подгружаются по курсору.
+COMMENTS_PAGE_SIZE = 20
+
+# Лента подписок: сколько записей хранить на пользователя и начиная
+# с какого числа подписчиков посты автора собираются при чтении.
+FOLLOW_FEED_MAX_ENTRIES = 800
+FOLLOW_FEED_FANOUT_LIMIT = 5000
+
+# Популярные посты (posts.trending): окно событий и период, за который
+# вклад события слабеет вдвое, в часах; сколько постов хранить и вес
+# подписки на автора относительно комментария.
+TRENDING_WINDOW_HOURS = 72
+TRENDING_HALF_LIFE_HOURS = 12
+TRENDING_SIZE = 50
+TRENDING_FOLLOW_WEIGHT = 2
+
+# Карта сайта и ленты RSS/Atom (posts.syndication): адресов в одном
+# файле карты, постов в ленте и записей в одной части потока.
+SITEMAP_LIMIT = 50000
+FEED_SIZE = 50
+SYNDICATION_CHUNK_SIZE = 500
+
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
-CACHES = {
-    'default': {
+# Карточки постов кэшируются под ключом, зависящим от их содержимого,
+# поэтому срок жизни может быть долгим.
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Страницы лент сбрасываются сменой поколения, а не по времени.
+PAGE_CACHE_TIMEOUT = 60 * 60
+PAGE_CACHE_LOCK_TIMEOUT = 5
+
+# Загруженные картинки постов уменьшаются до этих размеров и
+# пересохраняются без EXIF; качество JPEG от 1 до 95.
+POST_IMAGE_MAX_SIZE = (1920, 1920)
+POST_IMAGE_QUALITY = 85
+
+# Миниатюры картинок постов строятся в фоне для каждого размера.
+POST_THUMBNAILS = {
+    'card': {'geometry': '960x339', 'crop': 'center', 'upscale': True},
+}
+# Потоки, которые строят миниатюры без очереди задач; в тестах пула нет
+# и миниатюры строятся сразу.
+POST_THUMBNAIL_WORKERS = 0 if TESTING else 2
+
+# Бэкенд поиска: 'fts5', 'tokens' или 'auto' — fts5, если SQLite его
+# поддерживает. После смены нужен rebuild_search_index.
+POST_SEARCH_BACKEND = 'auto'
+
+# Доля запросов, которые профилирует core.profiling.ProfilingMiddleware,
+# и сколько последних замеров хранит процесс для отчёта.
+PROFILING_SAMPLE_RATE = 0.05
+PROFILING_BUFFER_SIZE = 2000
+
+# Кэш должен быть общим для всех процессов сервера, иначе каждый
+# процесс строит свои страницы и не видит смены поколения у соседей.
+# YATUBE_CACHE_URL: redis://хост:порт/база — сервер Redis,
+# file:///путь — файлы на диске; без адреса — память процесса, что
+# годится только для разработки и тестов.
+CACHE_URL = os.environ.get('YATUBE_CACHE_URL', '')
+if CACHE_URL.startswith('redis://'):
+    CACHE_BACKEND = {
+        'BACKEND': 'core.redis_cache.RedisCache',
+        'LOCATION': CACHE_URL,
+    }
+elif CACHE_URL.startswith('file://'):
+    CACHE_BACKEND = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_URL[len('file://'):],
+    }
+else:
+    CACHE_BACKEND = {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
+CACHES = {
+    'default': dict(CACHE_BACKEND, KEY_PREFIX='yatube'),
+}
+if CACHE_URL:
+    # Горячие ключи читаются из памяти процесса (core.tiered_cache), а
+    # общий кэш остаётся источником правды для всех процессов.
+    CACHES['shared'] = CACHES['default']
+    CACHES['default'] = {
+        'BACKEND': 'core.tiered_cache.TieredCache',
+        'LOCATION': 'default',
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'LOCAL_PREFIXES': (
+                'posts:generation', 'posts:card:', 'posts:group:',
+                'posts:views.decorators.cache.',
+            ),
+            'MAX_ENTRIES': 500,
+            'LOCAL_TIMEOUT': 30,
+            'STAMP_INTERVAL': 1,
+        },
+    }
+
+# Версии пространств ключей кэша (core.cache.CacheNamespace):
+# увеличение версии забывает всё пространство во всех процессах,
+# например после смены разметки карточек постов.
+CACHE_NAMESPACE_VERSIONS = {
+    'posts': 1,
+    'follows': 1,
 }